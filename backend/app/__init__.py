@@ -15,9 +15,9 @@ except ImportError:
     pass
 
 from flask import Flask, request, jsonify, g
-from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from werkzeug.middleware.proxy_fix import ProxyFix
+from sqlalchemy.orm import configure_mappers
 
 from .models import db
 from .utils.logger import configure_logging
@@ -43,6 +43,13 @@ def create_app(test_config: Optional[Dict[str, Any]] = None) -> Flask:
     # Create and configure the app
     app = Flask(__name__, instance_relative_config=True, static_folder='static', static_url_path='/')
     
+    # Encode jsonify responses with orjson when it's installed
+    try:
+        from .utils.json_provider import OrjsonProvider
+        app.json = OrjsonProvider(app)
+    except ImportError:
+        pass
+    
     # Load config
     if test_config is None:
         app.config.from_object(get_config())
@@ -61,8 +68,10 @@ def create_app(test_config: Optional[Dict[str, Any]] = None) -> Flask:
     
     # Initialize extensions
     db.init_app(app)
-    migrate = Migrate()
-    migrate.init_app(app, db)
+    # Migrations are only needed for the `flask db` commands; skip importing Alembic otherwise
+    if app.config.get('ENABLE_MIGRATIONS', not app.config.get('TESTING')):
+        from .models import migrate
+        migrate.init_app(app, db)
     jwt = JWTManager(app)
     
     # Initialize database adapter
@@ -111,6 +120,13 @@ def create_app(test_config: Optional[Dict[str, Any]] = None) -> Flask:
         "supports_credentials": True
     }})
     
+    # Origins accepted by the preflight handler, resolved once instead of per request
+    preflight_origins = set([netlify_domain] if flask_env == 'production' else local_domains)
+    preflight_origins.update(
+        origin.strip() for origin in os.environ.get('CORS_ORIGINS', '').split(',') if origin.strip()
+    )
+    preflight_origins = frozenset(preflight_origins)
+    
     @app.route('/health')
     def health_check():
         """Simple health check endpoint."""
@@ -126,21 +142,8 @@ def create_app(test_config: Optional[Dict[str, Any]] = None) -> Flask:
         # Get origin from request
         origin = request.headers.get('Origin')
         
-        # Determine allowed origins based on environment
-        allowed_origins = []
-        if flask_env == 'production':
-            allowed_origins = [netlify_domain]
-        else:
-            allowed_origins = local_domains
-            
-        # Add any additional origins from environment
-        if os.environ.get('CORS_ORIGINS'):
-            for origin_entry in os.environ.get('CORS_ORIGINS').split(','):
-                if origin_entry.strip() and origin_entry.strip() not in allowed_origins:
-                    allowed_origins.append(origin_entry.strip())
-        
         # If origin matches allowed domains, set CORS headers
-        if origin in allowed_origins:
+        if origin in preflight_origins:
             response.headers.extend({
                 'Access-Control-Allow-Origin': origin,
                 'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
@@ -369,6 +372,10 @@ def create_app(test_config: Optional[Dict[str, Any]] = None) -> Flask:
     app.register_blueprint(systems_bp, url_prefix='/api')
     app.register_blueprint(relationships_bp, url_prefix='/api')
     
+    # Configure all ORM mappers now that every model is imported, so the cost (and any
+    # mapping error) lands at startup instead of on the first request
+    configure_mappers()
+    
     @app.route('/', methods=['GET'])
     def index():
         """Serves the main index page (React frontend)."""
@@ -9,7 +9,7 @@ from marshmallow import Schema, fields, validate, ValidationError
 from email_validator import validate_email, EmailNotValidError
 
 from ..models import db, User, IFSSystem, Part
-from ..utils.auth_adapter import auth_required, register_user, login_user, use_supabase_auth
+from ..utils.auth_adapter import auth_required, register_user, login_user, use_supabase_auth, get_user_by_id
 
 auth_bp = Blueprint('auth', __name__)
 logger = logging.getLogger(__name__)
@@ -104,31 +104,25 @@ def register():
         # Determine auth method based on whether refresh_token was returned (only Supabase returns one)
         auth_method = "supabase" if refresh_token else "jwt"
         
-        # Create a new system for the user
-        try:
-            # For all auth types, create a system
-            system = IFSSystem(user_id=user_data["id"])
-            db.session.add(system)
-            db.session.flush()
+        # Create a new system for the user. Supabase users get theirs from register_user
+        # (or from auth_required on first login if the signup still needs confirmation).
+        if auth_method == "jwt" and not user_data.get("confirmation_required"):
+            try:
+                system = IFSSystem(user_id=user_data["id"])
+                db.session.add(system)
+                db.session.flush()
             
-            # Add default "Self" part with DETAILED attributes
-            self_part = Part(
-                name="Self", 
-                system_id=str(system.id),
-                role="Self", # Keep role as Self for consistency 
-                description="The centered, compassionate Self that is the goal of IFS therapy.", # Use detailed description
-                feelings=["Calm", "curious", "compassionate", "connected", "clear", "confident", "creative", "courageous"], # Add 8 Cs
-                beliefs=["All parts are welcome. I can hold space for all experiences."] # Add core belief
-            )
-            db.session.add(self_part)
-            db.session.commit()
+                # Add default "Self" part with DETAILED attributes
+                self_part = Part.create_self(system.id)
+                db.session.add(self_part)
+                db.session.commit()
             
-            logger.info(f"Created system and default 'Self' part for user {email} with ID {user_data.get('id')}")
-        except Exception as system_error:
-            logger.error(f"Error creating system for user {email}: {str(system_error)}")
-            # Try to rollback just the system creation
-            db.session.rollback()
-            # Still return success since the user was created
+                logger.info(f"Created system and default 'Self' part for user {email} with ID {user_data.get('id')}")
+            except Exception as system_error:
+                logger.error(f"Error creating system for user {email}: {str(system_error)}")
+                # Try to rollback just the system creation
+                db.session.rollback()
+                # Still return success since the user was created
             
         confirmation_required = user_data.get("confirmation_required", False)
         if confirmation_required:
@@ -226,7 +220,7 @@ def get_current_user():
     logger.debug(f"Fetching full profile for user ID: {user_id} from g context")
     
     # Query the database for the full user object
-    user = db.session.query(User).filter_by(id=user_id).first()
+    user = get_user_by_id(user_id)
     
     if not user:
         # This case is unlikely if auth_required succeeded but good practice to check
@@ -345,7 +339,7 @@ def update_profile():
          return jsonify({"error": "Validation failed", "details": {"firstName": "Name is too long (max 100 characters)."}}), 400
 
     try:
-        user = db.session.query(User).filter_by(id=user_id).first()
+        user = get_user_by_id(user_id)
         if not user:
             logger.error(f"User with ID {user_id} found in token but not in database for /profile update.")
             return jsonify({"error": "User profile not found"}), 404
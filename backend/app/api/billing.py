@@ -31,7 +31,7 @@ def create_checkout_session():
         return jsonify({"error": "Invalid token claims"}), 401
         
     # Fetch user from DB using the verified ID
-    user = db.session.query(User).filter_by(id=user_id).first()
+    user = auth_adapter.get_user_by_id(user_id)
     
     # === Original function logic starts here ===
     data = request.get_json()
@@ -145,7 +145,7 @@ def create_portal_session():
         return jsonify({"error": "Invalid token claims"}), 401
         
     # Fetch user from DB using the verified ID
-    user = db.session.query(User).filter_by(id=user_id).first()
+    user = auth_adapter.get_user_by_id(user_id)
     
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -1,8 +1,9 @@
 """
 Journals API routes for managing IFS journal entries.
 """
+import json
 import logging
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, request, jsonify, g, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import Schema, fields, validate, ValidationError
 import uuid
@@ -10,6 +11,7 @@ from datetime import date # Import date for daily check
 
 from ..models import db, Journal, Part, IFSSystem, User
 from ..utils.auth_adapter import auth_required
+from ..utils.system_lookup import get_system_id_for_user
 
 journals_bp = Blueprint('journals', __name__)
 logger = logging.getLogger(__name__)
@@ -22,6 +24,15 @@ class JournalSchema(Schema):
     part_id = fields.String(allow_none=True)
     metadata = fields.String(allow_none=True)  # Keep as metadata in API schema for consistency
 
+def _stream_journals(journals):
+    """Yield a JSON array of serialized journals chunk by chunk."""
+    yield '['
+    separator = ''
+    for journal in journals:
+        yield separator + json.dumps(journal.to_dict())
+        separator = ','
+    yield ']'
+
 @journals_bp.route('/journals', methods=['GET'])
 @auth_required
 def get_journals():
@@ -37,23 +48,24 @@ def get_journals():
     
     if system_id:
         # Verify the system belongs to the user
-        system = IFSSystem.query.filter_by(id=system_id, user_id=user_id).first()
-        if not system:
+        owned = db.session.query(IFSSystem.query.filter_by(id=system_id, user_id=user_id).exists()).scalar()
+        if not owned:
             logger.error(f"System {system_id} not found for user {user_id}")
             return jsonify({"error": "System not found or unauthorized"}), 404
     else:
         # Look up the system for the user
-        system = IFSSystem.query.filter_by(user_id=user_id).first()
-        if not system:
+        system_id = get_system_id_for_user(user_id)
+        if not system_id:
             logger.error(f"System not found for user {user_id}")
             return jsonify({"error": "System not found"}), 404
-        system_id = str(system.id)
     
-    # Get journals for the system
-    journals = Journal.query.filter_by(system_id=system_id).all()
+    # Stream journals for the system in batches rather than building the full list first
+    journals = Journal.query.filter_by(system_id=system_id).yield_per(100)
     
-    logger.info(f"Retrieved {len(journals)} journals for system {system_id}")
-    return jsonify([journal.to_dict() for journal in journals])
+    logger.info(f"Streaming journals for system {system_id}")
+    return current_app.response_class(
+        stream_with_context(_stream_journals(journals)), mimetype='application/json'
+    )
 
 @journals_bp.route('/journals', methods=['POST'])
 @auth_required
@@ -62,13 +74,13 @@ def create_journal():
     try:
         user_id = g.current_user['id']
         user = db.session.get(User, user_id)
-        system = IFSSystem.query.filter_by(user_id=user_id).first()
+        system_id = get_system_id_for_user(user_id)
 
         if not user:
              logger.error(f"User {user_id} not found during journal creation.")
              return jsonify({"error": "Authenticated user not found in database"}), 404
              
-        if not system:
+        if not system_id:
             logger.error(f"System not found for user {user_id}")
             return jsonify({"error": "System not found"}), 404
 
@@ -110,8 +122,8 @@ def create_journal():
         
         # If part_id is provided, verify it exists
         if part_id:
-            part = Part.query.filter_by(id=part_id, system_id=str(system.id)).first()
-            if not part:
+            part_exists = db.session.query(Part.query.filter_by(id=part_id, system_id=system_id).exists()).scalar()
+            if not part_exists:
                 logger.warning(f"Part {part_id} not found")
                 return jsonify({"error": f"Part {part_id} not found"}), 404
         
@@ -120,7 +132,7 @@ def create_journal():
             title=data.get('title', 'Untitled Journal'),
             content=data.get('content', ''),
             part_id=part_id,
-            system_id=str(system.id),
+            system_id=system_id,
             journal_metadata=data.get('metadata', '')  # Use journal_metadata in model
         )
         
@@ -165,13 +177,13 @@ def get_journal(journal_id):
         JSON response with the requested journal entry.
     """
     user_id = g.current_user['id'] if hasattr(g, 'current_user') else get_jwt_identity()
-    system = IFSSystem.query.filter_by(user_id=user_id).first()
+    system_id = get_system_id_for_user(user_id)
     
-    if not system:
+    if not system_id:
         logger.error(f"System not found for user {user_id}")
         return jsonify({"error": "System not found"}), 404
     
-    journal = Journal.query.filter_by(id=journal_id, system_id=str(system.id)).first()
+    journal = Journal.query.filter_by(id=journal_id, system_id=system_id).first()
     
     if not journal:
         logger.warning(f"Journal {journal_id} not found")
@@ -193,13 +205,13 @@ def update_journal(journal_id):
     """
     try:
         user_id = g.current_user['id'] if hasattr(g, 'current_user') else get_jwt_identity()
-        system = IFSSystem.query.filter_by(user_id=user_id).first()
+        system_id = get_system_id_for_user(user_id)
         
-        if not system:
+        if not system_id:
             logger.error(f"System not found for user {user_id}")
             return jsonify({"error": "System not found"}), 404
         
-        journal = Journal.query.filter_by(id=journal_id, system_id=str(system.id)).first()
+        journal = Journal.query.filter_by(id=journal_id, system_id=system_id).first()
         
         if not journal:
             logger.warning(f"Journal {journal_id} not found")
@@ -216,8 +228,8 @@ def update_journal(journal_id):
             # If part_id is provided, verify it exists
             part_id = data['part_id']
             if part_id:
-                part = Part.query.filter_by(id=part_id, system_id=str(system.id)).first()
-                if not part:
+                part_exists = db.session.query(Part.query.filter_by(id=part_id, system_id=system_id).exists()).scalar()
+                if not part_exists:
                     logger.warning(f"Part {part_id} not found")
                     return jsonify({"error": f"Part {part_id} not found"}), 404
             journal.part_id = part_id
@@ -250,14 +262,14 @@ def delete_journal(journal_id):
     """
     try:
         user_id = g.current_user['id'] if hasattr(g, 'current_user') else get_jwt_identity()
-        system = IFSSystem.query.filter_by(user_id=user_id).first()
+        system_id = get_system_id_for_user(user_id)
         
-        if not system:
+        if not system_id:
             logger.error(f"System not found for user {user_id}")
             return jsonify({"error": "System not found"}), 404
         
         # Find the journal entry ensuring it belongs to the user's system
-        journal = Journal.query.filter_by(id=journal_id, system_id=str(system.id)).first()
+        journal = Journal.query.filter_by(id=journal_id, system_id=system_id).first()
         
         if not journal:
             logger.warning(f"Journal {journal_id} not found or unauthorized for user {user_id}")
@@ -3,14 +3,17 @@ API routes for managing parts in an IFS system.
 Supports both SQLAlchemy and Supabase backends.
 """
 import logging
+import hashlib
 from flask import Blueprint, request, jsonify, current_app, g
 from marshmallow import Schema, fields, ValidationError, EXCLUDE
-from datetime import datetime
-from uuid import uuid4
+from sqlalchemy import text
+from uuid import uuid4, UUID
 from typing import Dict, Any, List, Optional
 
 from ..models import db, Part, PartConversation, User, IFSSystem
 from ..utils.auth_adapter import auth_required
+from ..utils.validation import check_required_strings
+from ..utils.cache import TTLCache
 
 parts_bp = Blueprint('parts', __name__)
 logger = logging.getLogger(__name__)
@@ -18,6 +21,79 @@ logger = logging.getLogger(__name__)
 # Table name for Supabase operations
 TABLE_NAME = 'parts'
 
+# Part limits per subscription tier ('unlimited' has none)
+FREE_PART_LIMIT = 10
+PRO_PART_LIMIT = 20
+
+# Tier, system ownership and part count for create_part's limit check.
+# owned_system_id is NULL when the system doesn't exist or belongs to someone else.
+# The count stops at :max_limit rows since we only need to know whether the cap is hit.
+_PART_LIMIT_QUERY = text("""
+    SELECT u.subscription_tier,
+           s.id AS owned_system_id,
+           (SELECT COUNT(*) FROM (
+                SELECT 1 FROM parts p WHERE p.system_id = s.id LIMIT :max_limit
+           ) capped) AS part_count
+    FROM users u
+    LEFT JOIN ifs_systems s ON s.id = :sid AND s.user_id = u.id
+    WHERE u.id = :uid
+""")
+
+# Parts of a system as one JSON array, serialized by Postgres in the same shape as Part.to_dict()
+_PARTS_JSON_QUERY = text("""
+    SELECT COALESCE(json_agg(json_build_object(
+        'id', p.id,
+        'name', p.name,
+        'system_id', p.system_id,
+        'role', p.role,
+        'description', p.description,
+        'feelings', COALESCE(p.feelings, '[]'::jsonb),
+        'beliefs', COALESCE(p.beliefs, '[]'::jsonb),
+        'triggers', COALESCE(p.triggers, '[]'::jsonb),
+        'needs', COALESCE(p.needs, '[]'::jsonb),
+        'created_at', p.created_at,
+        'updated_at', p.updated_at
+    )), '[]'::json)::text
+    FROM parts p
+    WHERE p.system_id = :sid
+""")
+
+# Deletes a part unless it is "Self", taking its relationships with it and detaching
+# its journal entries (what the ORM cascades did). Conversations and personality
+# vectors go via ON DELETE CASCADE.
+_DELETE_PART_SQL = text("""
+    WITH target AS (
+        SELECT id FROM parts WHERE id = :id AND name <> 'Self'
+    ), deleted_relationships AS (
+        DELETE FROM relationships
+        WHERE part1_id IN (SELECT id FROM target) OR part2_id IN (SELECT id FROM target)
+    ), detached_journals AS (
+        UPDATE journals SET part_id = NULL
+        WHERE part_id IN (SELECT id FROM target)
+    )
+    DELETE FROM parts WHERE id IN (SELECT id FROM target)
+    RETURNING id
+""")
+
+_PART_NAME_QUERY = text("SELECT name FROM parts WHERE id = :id")
+
+# Encoded GET /parts bodies keyed by (user_id, etag)
+_parts_cache = TTLCache(maxsize=1024, ttl=3600)
+
+# Columns a client may request via ?fields= for lightweight list views
+LIST_COLUMNS = frozenset(['id', 'name', 'role', 'description', 'system_id', 'feelings',
+                          'beliefs', 'triggers', 'needs', 'created_at', 'updated_at'])
+
+def _make_etag(*values) -> str:
+    """Build an ETag value from the given version components."""
+    return hashlib.md5(':'.join(str(v) for v in values).encode('utf-8')).hexdigest()
+
+def _not_modified(etag: str, weak: bool = False):
+    """Build an empty 304 response carrying the given ETag."""
+    response = current_app.response_class(status=304)
+    response.set_etag(etag, weak=weak)
+    return response
+
 # Input validation schemas
 class PartSchema(Schema):
     """Part schema validation."""
@@ -48,11 +124,20 @@ class PartUpdateSchema(Schema):
         # This makes the schema ignore unknown fields instead of raising errors
         unknown = EXCLUDE
 
+# Schema instances are built once per process; load() is safe to share across requests
+_part_schema = PartSchema()
+# system_id is excluded from updates, so EXCLUDE drops it from the validated output
+_part_update_schema = PartUpdateSchema(exclude=('system_id',))
+
 @parts_bp.route('/parts', methods=['GET'])
 @auth_required
 def get_parts():
     """Get all parts for the current user's system.
     
+    Query params:
+        system_id: ID of the system to list parts for.
+        fields: (Optional) Comma-separated subset of columns to return, e.g. "id,name,role".
+    
     Returns:
         JSON response with parts data.
     """
@@ -62,11 +147,49 @@ def get_parts():
         if not system_id:
             return jsonify({"error": "system_id is required"}), 400
         
+        # Optional column projection for list views
+        columns = None
+        fields_param = request.args.get('fields')
+        if fields_param:
+            columns = tuple(field.strip() for field in fields_param.split(',') if field.strip())
+            invalid = [column for column in columns if column not in LIST_COLUMNS]
+            if invalid:
+                return jsonify({"error": f"Unknown fields: {', '.join(invalid)}"}), 400
+        
         # Use the database adapter
         filter_dict = {'system_id': system_id}
-        parts = current_app.db_adapter.get_all(TABLE_NAME, Part, filter_dict)
         
-        return jsonify(parts)
+        # Weak ETag from the row count and latest updated_at; lets polling
+        # clients skip the full fetch when nothing has changed
+        version = current_app.db_adapter.get_version(TABLE_NAME, Part, filter_dict)
+        etag = _make_etag(system_id, fields_param, version) if version else None
+        if etag and request.if_none_match.contains_weak(etag):
+            return _not_modified(etag, weak=True)
+        
+        # The ETag already encodes (system_id, fields, version), so a changed or deleted
+        # part produces a new key and stale entries simply age out of the LRU
+        cache_key = (str(g.current_user['id']), etag) if etag else None
+        cached_body = _parts_cache.get(cache_key) if cache_key else None
+        
+        if cached_body is not None:
+            response = current_app.response_class(cached_body, mimetype='application/json')
+        elif columns or current_app.db_adapter.using_supabase:
+            parts = current_app.db_adapter.get_all(TABLE_NAME, Part, filter_dict, columns=columns)
+            response = jsonify(parts)
+            # get_all returns [] on errors too; only cache an empty list for an empty system
+            if cache_key and (parts or version.startswith('0-')):
+                _parts_cache.set(cache_key, response.get_data())
+        else:
+            # Let Postgres encode the whole array as one scalar, skipping ORM hydration;
+            # a DB error still surfaces before any bytes are sent
+            body = db.session.execute(_PARTS_JSON_QUERY, {"sid": system_id}).scalar_one().encode('utf-8')
+            response = current_app.response_class(body, mimetype='application/json')
+            if cache_key:
+                _parts_cache.set(cache_key, body)
+        
+        if etag:
+            response.set_etag(etag, weak=True)
+        return response
     except Exception as e:
         logger.error(f"Error fetching parts: {str(e)}")
         return jsonify({"error": "An error occurred while fetching parts"}), 500
@@ -88,8 +211,14 @@ def get_part(part_id):
         
         if not part:
             return jsonify({"error": "Part not found"}), 404
+        
+        etag = _make_etag(part.get('id'), part.get('updated_at'))
+        if request.if_none_match.contains_weak(etag):
+            return _not_modified(etag)
             
-        return jsonify(part)
+        response = jsonify(part)
+        response.set_etag(etag)
+        return response
     except Exception as e:
         logger.error(f"Error fetching part: {str(e)}")
         return jsonify({"error": "An error occurred while fetching the part"}), 500
@@ -100,40 +229,48 @@ def create_part():
     """Create a new part, checking subscription limits."""
     try:
         user_id = g.current_user['id']
-        user = db.session.get(User, user_id)
+        data = request.get_json(cache=True) or {}
+        system_id = data.get('system_id')
         
-        if not user:
-             logger.error(f"User {user_id} not found during part creation.")
-             # This case should ideally not happen if auth_required works
-             return jsonify({"error": "Authenticated user not found in database"}), 404
+        # auth_required passes the tier along when it loaded the user row (Supabase path,
+        # user not yet cached as bootstrapped); unlimited users need no limit check at all
+        subscription_tier = g.current_user.get('subscription_tier')
+        limit_row = None
+        if subscription_tier != 'unlimited':
+            # Fetch the user's tier, whether they own the target system, and its part count
+            # in a single round trip
+            limit_row = db.session.execute(
+                _PART_LIMIT_QUERY,
+                {"uid": user_id, "sid": system_id, "max_limit": max(FREE_PART_LIMIT, PRO_PART_LIMIT)}
+            ).first()
+            
+            if not limit_row:
+                 logger.error(f"User {user_id} not found during part creation.")
+                 # This case should ideally not happen if auth_required works
+                 return jsonify({"error": "Authenticated user not found in database"}), 404
+
+            subscription_tier = limit_row.subscription_tier
 
         # --- Subscription Limit Check --- 
-        if user.subscription_tier != 'unlimited':
-            # Get system_id from request data first
-            data = request.json
-            system_id = data.get('system_id')
+        if subscription_tier != 'unlimited':
             if not system_id:
                  # Validation handles this later, but check early for clarity
                  return jsonify({"error": "system_id is required"}), 400
                  
             # Check if the system belongs to the user (important security check)
-            system = db.session.query(IFSSystem).filter_by(id=system_id, user_id=user_id).first()
-            if not system:
+            if limit_row.owned_system_id is None:
                 logger.warning(f"User {user_id} attempting to create part in system {system_id} they don't own.")
                 return jsonify({"error": "System not found or access denied"}), 403
 
-            # Count existing parts in this system
-            current_part_count = db.session.query(Part).filter_by(system_id=system_id).count()
-            
             # New limits: Free=10, Pro=20
-            limit = 20 if user.subscription_tier == 'pro' else 10
+            limit = PRO_PART_LIMIT if subscription_tier == 'pro' else FREE_PART_LIMIT
             
-            if current_part_count >= limit:
-                logger.info(f"Part limit reached for user {user_id} (Tier: {user.subscription_tier}, Limit: {limit}, Count: {current_part_count})")
-                tier_name = user.subscription_tier.capitalize()
+            if limit_row.part_count >= limit:
+                logger.info(f"Part limit reached for user {user_id} (Tier: {subscription_tier}, Limit: {limit}, Count: >= {limit})")
+                tier_name = subscription_tier.capitalize()
                 # Generalize message for free tier
                 upgrade_suggestion = "Please upgrade to add more parts."
-                if user.subscription_tier == 'pro':
+                if subscription_tier == 'pro':
                      upgrade_suggestion = "Please upgrade to Unlimited to add more parts."
                 
                 return jsonify({
@@ -142,22 +279,20 @@ def create_part():
         # --- End Limit Check ---
         
         # Proceed with existing part creation logic
-        data = request.json # Re-get data if not already fetched
         logger.debug(f"Received part creation request: {data}")
         
         # Validate input
+        errors = check_required_strings(data, ('name', 'system_id'))
+        if errors:
+            logger.error(f"Part schema validation failed: {errors}")
+            return jsonify({"error": "Validation failed", "details": errors}), 400
         try:
-            PartSchema().load(data)
+            _part_schema.load(data)
             logger.debug("Part schema validation passed")
         except ValidationError as e:
             logger.error(f"Part schema validation failed: {e.messages}")
             return jsonify({"error": "Validation failed", "details": e.messages}), 400
         
-        # system_id check is done above
-        # if 'system_id' not in data:
-        #     logger.error("No system_id provided in part creation request")
-        #     return jsonify({"error": "system_id is required"}), 400
-            
         logger.debug(f"Using system_id: {data['system_id']} for new part")
             
         # Use the database adapter
@@ -193,31 +328,27 @@ def update_part(part_id):
         JSON response with updated part data.
     """
     try:
-        data = request.json
+        data = request.get_json(cache=True) or {}
         logger.info(f"Updating part {part_id} with data: {data}")
         
-        # For update operations, system_id should be optional
-        # First, get the existing part to ensure it exists
-        existing_part = current_app.db_adapter.get_by_id(TABLE_NAME, Part, part_id)
-        if not existing_part:
-            return jsonify({"error": "Part not found"}), 404
-        
-        # Validate input with update schema (doesn't require system_id)
+        # Validate input with update schema (doesn't require system_id) before touching the DB.
+        # Only fields known to the schema make it into the update.
+        errors = check_required_strings(data, ('name',))
+        if errors:
+            logger.error(f"Validation error updating part: {errors}")
+            return jsonify({"error": "Validation failed", "details": errors}), 400
         try:
-            PartUpdateSchema().load(data)
+            data = _part_update_schema.load(data)
         except ValidationError as e:
             logger.error(f"Validation error updating part: {e.messages}")
             return jsonify({"error": "Validation failed", "details": e.messages}), 400
         
-        # Remove system_id if present (shouldn't be updated)
-        data.pop('system_id', None)
-        
-        # Explicitly set updated_at to current time to ensure it's updated
-        from datetime import datetime
-        data['updated_at'] = datetime.utcnow().isoformat()
-        logger.info(f"Setting updated_at to {data['updated_at']} for part update")
+        # Get the existing part to ensure it exists
+        existing_part = current_app.db_adapter.get_by_id(TABLE_NAME, Part, part_id)
+        if not existing_part:
+            return jsonify({"error": "Part not found"}), 404
         
-        # Use the database adapter to update
+        # Use the database adapter to update (it bumps updated_at)
         part = current_app.db_adapter.update(TABLE_NAME, Part, part_id, data)
         if not part:
             logger.error(f"Update failed for part {part_id}")
@@ -244,6 +375,9 @@ def delete_part(part_id):
         JSON response with success message.
     """
     try:
+        if not current_app.db_adapter.using_supabase:
+            return _delete_part_sql(part_id)
+        
         # First, get the part to check its name
         part_to_delete = current_app.db_adapter.get_by_id(TABLE_NAME, Part, part_id)
         
@@ -266,8 +400,37 @@ def delete_part(part_id):
         logger.info(f"Part {part_id} deleted successfully.")
         return jsonify({"message": "Part deleted successfully"})
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Error deleting part: {str(e)}")
         return jsonify({"error": "An error occurred while deleting the part"}), 500
 
+def _delete_part_sql(part_id):
+    """Delete a non-Self part in one statement (SQLAlchemy backend).
+    
+    Args:
+        part_id: Part ID
+        
+    Returns:
+        JSON response with success message, 404 or 403.
+    """
+    try:
+        UUID(str(part_id))
+    except ValueError:
+        return jsonify({"error": "Part not found"}), 404
+    
+    deleted = db.session.execute(_DELETE_PART_SQL, {"id": part_id}).first()
+    db.session.commit()
+    
+    if deleted is None:
+        # Nothing deleted: tell "missing" apart from "protected Self part"
+        name = db.session.execute(_PART_NAME_QUERY, {"id": part_id}).scalar()
+        if name is None:
+            return jsonify({"error": "Part not found"}), 404
+        logger.warning(f"Attempt to delete the core 'Self' part (ID: {part_id}) was blocked.")
+        return jsonify({"error": "The core 'Self' part cannot be deleted."}), 403 # Forbidden
+    
+    logger.info(f"Part {part_id} deleted successfully.")
+    return jsonify({"message": "Part deleted successfully"})
+
 # Remove the duplicate conversation routes entirely from parts.py
 # The routes in conversations.py will handle these endpoints 
\ No newline at end of file
@@ -2,13 +2,18 @@
 Relationships API routes for managing connections between IFS parts.
 """
 import logging
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, request, jsonify, g, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from marshmallow import Schema, fields, validate, ValidationError
+from marshmallow import Schema, fields, validate, ValidationError, EXCLUDE
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 import uuid
 
 from ..models import db, Relationship, Part, IFSSystem
 from ..utils.auth_adapter import auth_required
+from ..utils.validation import check_required_strings
+from ..utils.responses import error_response, SYSTEM_NOT_FOUND, RELATIONSHIP_NOT_FOUND
+from ..utils.system_lookup import get_system_id_for_user
 
 relationships_bp = Blueprint('relationships', __name__)
 logger = logging.getLogger(__name__)
@@ -21,6 +26,37 @@ class RelationshipSchema(Schema):
     relationship_type = fields.String(required=True, validate=validate.Length(min=1, max=100))
     description = fields.String(allow_none=True)
 
+_relationship_schema = RelationshipSchema()
+
+# All relationships in a system, serialized as a JSON array by Postgres
+_RELATIONSHIPS_JSON_QUERY = text("""
+    SELECT COALESCE(json_agg(json_build_object(
+        'id', r.id,
+        'source_id', r.part1_id,
+        'target_id', r.part2_id,
+        'relationship_type', r.relationship_type,
+        'description', r.description,
+        'created_at', r.created_at
+    )), '[]'::json)::text
+    FROM relationships r
+    WHERE r.system_id = :sid
+""")
+
+# Existence checks for create_relationship: source part, target part, existing relationship
+_RELATIONSHIP_CHECKS_QUERY = text("""
+    SELECT
+        EXISTS (SELECT 1 FROM parts WHERE id = :src AND system_id = :sid) AS src_ok,
+        EXISTS (SELECT 1 FROM parts WHERE id = :tgt AND system_id = :sid) AS tgt_ok,
+        EXISTS (
+            SELECT 1 FROM relationships
+            WHERE part1_id = :src AND part2_id = :tgt AND system_id = :sid
+        ) AS dup
+""")
+
+_DELETE_RELATIONSHIP_SQL = text("""
+    DELETE FROM relationships WHERE id = :id AND system_id = :sid RETURNING id
+""")
+
 @relationships_bp.route('/relationships', methods=['GET'])
 @auth_required
 def get_relationships():
@@ -30,16 +66,17 @@ def get_relationships():
         JSON response with all relationships.
     """
     user_id = g.current_user['id'] if hasattr(g, 'current_user') else get_jwt_identity()
-    system = IFSSystem.query.filter_by(user_id=user_id).first()
+    system_id = get_system_id_for_user(user_id)
     
-    if not system:
+    if not system_id:
         logger.error(f"System not found for user {user_id}")
-        return jsonify({"error": "System not found"}), 404
+        return error_response(SYSTEM_NOT_FOUND, 404)
     
-    relationships = Relationship.query.filter_by(system_id=str(system.id)).all()
+    # Postgres builds the JSON array directly, in the same shape as Relationship.to_dict()
+    payload = db.session.execute(_RELATIONSHIPS_JSON_QUERY, {"sid": system_id}).scalar()
     
-    logger.info(f"Retrieved {len(relationships)} relationships for user {user_id}")
-    return jsonify([rel.to_dict() for rel in relationships])
+    logger.info(f"Retrieved relationships for user {user_id}")
+    return current_app.response_class(payload, mimetype='application/json')
 
 @relationships_bp.route('/relationships', methods=['POST'])
 @auth_required
@@ -50,17 +87,21 @@ def create_relationship():
         JSON response with the created relationship.
     """
     try:
+        data = request.get_json(cache=True) or {}
         user_id = g.current_user['id'] if hasattr(g, 'current_user') else get_jwt_identity()
-        system = IFSSystem.query.filter_by(user_id=user_id).first()
+        system_id = get_system_id_for_user(user_id)
         
-        if not system:
+        if not system_id:
             logger.error(f"System not found for user {user_id}")
-            return jsonify({"error": "System not found"}), 404
+            return error_response(SYSTEM_NOT_FOUND, 404)
         
         # Validate incoming data
+        errors = check_required_strings(data, ('source_id', 'target_id', 'relationship_type'))
+        if errors:
+            logger.warning(f"Validation error: {errors}")
+            return jsonify({"error": "Validation failed", "details": errors}), 400
         try:
-            data = request.json
-            RelationshipSchema().load(data)
+            _relationship_schema.load(data)
         except ValidationError as e:
             logger.warning(f"Validation error: {e.messages}")
             return jsonify({"error": "Validation failed", "details": e.messages}), 400
@@ -68,26 +109,22 @@ def create_relationship():
         source_id = data.get('source_id')
         target_id = data.get('target_id')
         
-        # Verify source part exists
-        source_part = Part.query.filter_by(id=source_id, system_id=str(system.id)).first()
-        if not source_part:
+        # Verify both parts exist in this system and the relationship isn't a duplicate
+        # in a single round trip
+        checks = db.session.execute(
+            _RELATIONSHIP_CHECKS_QUERY,
+            {"src": source_id, "tgt": target_id, "sid": system_id}
+        ).one()
+        
+        if not checks.src_ok:
             logger.warning(f"Source part {source_id} not found")
             return jsonify({"error": f"Source part {source_id} not found"}), 404
         
-        # Verify target part exists
-        target_part = Part.query.filter_by(id=target_id, system_id=str(system.id)).first()
-        if not target_part:
+        if not checks.tgt_ok:
             logger.warning(f"Target part {target_id} not found")
             return jsonify({"error": f"Target part {target_id} not found"}), 404
         
-        # Check if relationship already exists using part1_id/part2_id
-        existing_rel = Relationship.query.filter_by(
-            part1_id=source_id,
-            part2_id=target_id,
-            system_id=str(system.id)
-        ).first()
-        
-        if existing_rel:
+        if checks.dup:
             logger.warning(f"Relationship already exists between {source_id} and {target_id}")
             return jsonify({"error": f"Relationship already exists between these parts"}), 400
             
@@ -97,11 +134,17 @@ def create_relationship():
             target_id=target_id,
             relationship_type=data.get('relationship_type'),
             description=data.get('description', ''),
-            system_id=str(system.id)
+            system_id=system_id
         )
         
         db.session.add(relationship)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Lost a race with a concurrent request creating the same relationship
+            db.session.rollback()
+            logger.warning(f"Relationship already exists between {source_id} and {target_id}")
+            return jsonify({"error": f"Relationship already exists between these parts"}), 400
         
         logger.info(f"Created relationship: {relationship.relationship_type}")
         return jsonify({
@@ -126,17 +169,17 @@ def get_relationship(relationship_id):
         JSON response with the requested relationship.
     """
     user_id = g.current_user['id'] if hasattr(g, 'current_user') else get_jwt_identity()
-    system = IFSSystem.query.filter_by(user_id=user_id).first()
+    system_id = get_system_id_for_user(user_id)
     
-    if not system:
+    if not system_id:
         logger.error(f"System not found for user {user_id}")
-        return jsonify({"error": "System not found"}), 404
+        return error_response(SYSTEM_NOT_FOUND, 404)
     
-    relationship = Relationship.query.filter_by(id=relationship_id, system_id=str(system.id)).first()
+    relationship = Relationship.query.filter_by(id=relationship_id, system_id=system_id).first()
     
     if not relationship:
         logger.warning(f"Relationship {relationship_id} not found")
-        return jsonify({"error": "Relationship not found"}), 404
+        return error_response(RELATIONSHIP_NOT_FOUND, 404)
     
     logger.info(f"Retrieved relationship {relationship_id}")
     return jsonify(relationship.to_dict())
@@ -153,20 +196,27 @@ def update_relationship(relationship_id):
         JSON response with the updated relationship.
     """
     try:
+        data = request.get_json(cache=True) or {}
         user_id = g.current_user['id'] if hasattr(g, 'current_user') else get_jwt_identity()
-        system = IFSSystem.query.filter_by(user_id=user_id).first()
+        system_id = get_system_id_for_user(user_id)
         
-        if not system:
+        if not system_id:
             logger.error(f"System not found for user {user_id}")
-            return jsonify({"error": "System not found"}), 404
+            return error_response(SYSTEM_NOT_FOUND, 404)
         
-        relationship = Relationship.query.filter_by(id=relationship_id, system_id=str(system.id)).first()
+        relationship = Relationship.query.filter_by(id=relationship_id, system_id=system_id).first()
         
         if not relationship:
             logger.warning(f"Relationship {relationship_id} not found")
-            return jsonify({"error": "Relationship not found"}), 404
+            return error_response(RELATIONSHIP_NOT_FOUND, 404)
         
-        data = request.json
+        # Validate the fields being changed; extra keys clients echo back (id, created_at)
+        # are dropped rather than rejected
+        try:
+            data = _relationship_schema.load(data, partial=True, unknown=EXCLUDE)
+        except ValidationError as e:
+            logger.warning(f"Validation error: {e.messages}")
+            return jsonify({"error": "Validation failed", "details": e.messages}), 400
         
         # Update relationship fields
         if 'relationship_type' in data:
@@ -200,20 +250,21 @@ def delete_relationship(relationship_id):
     """
     try:
         user_id = g.current_user['id'] if hasattr(g, 'current_user') else get_jwt_identity()
-        system = IFSSystem.query.filter_by(user_id=user_id).first()
+        system_id = get_system_id_for_user(user_id)
         
-        if not system:
+        if not system_id:
             logger.error(f"System not found for user {user_id}")
-            return jsonify({"error": "System not found"}), 404
+            return error_response(SYSTEM_NOT_FOUND, 404)
         
-        relationship = Relationship.query.filter_by(id=relationship_id, system_id=str(system.id)).first()
+        # Ownership check and delete in one statement
+        deleted = db.session.execute(
+            _DELETE_RELATIONSHIP_SQL, {"id": relationship_id, "sid": system_id}
+        ).first()
+        db.session.commit()
         
-        if not relationship:
+        if deleted is None:
             logger.warning(f"Relationship {relationship_id} not found")
-            return jsonify({"error": "Relationship not found"}), 404
-        
-        db.session.delete(relationship)
-        db.session.commit()
+            return error_response(RELATIONSHIP_NOT_FOUND, 404)
         
         logger.info(f"Deleted relationship {relationship_id}")
         return jsonify({"success": True})
@@ -2,13 +2,19 @@
 Systems API routes for managing IFS systems.
 """
 import logging
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, request, jsonify, g, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import Schema, fields, validate, ValidationError
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import selectinload, raiseload
 import uuid
 
-from ..models import db, IFSSystem, Part
+from ..models import db, IFSSystem, Part, Relationship, Journal
 from ..utils.auth_adapter import auth_required
+from ..utils.validation import check_required_strings
+from ..utils.responses import error_response, SYSTEM_NOT_FOUND
+from ..utils.system_lookup import get_system_id_for_user, remember_system_id
 
 systems_bp = Blueprint('systems', __name__)
 logger = logging.getLogger(__name__)
@@ -19,6 +25,108 @@ class SystemSchema(Schema):
     name = fields.String(required=True, validate=validate.Length(min=1, max=200))
     description = fields.String(allow_none=True)
 
+_system_schema = SystemSchema()
+
+# reset_system as one statement: relationships, journals, then every part except "Self".
+# Postgres runs all data-modifying CTEs in the same snapshot and checks the
+# (NO ACTION) foreign keys at the end of the statement.
+_RESET_SYSTEM_SQL = text("""
+    WITH deleted_relationships AS (
+        DELETE FROM relationships
+        WHERE part1_id IN (SELECT id FROM parts WHERE system_id = :system_id)
+        OR part2_id IN (SELECT id FROM parts WHERE system_id = :system_id)
+        RETURNING 1
+    ), deleted_journals AS (
+        DELETE FROM journals
+        WHERE system_id = :system_id
+        RETURNING 1
+    ), deleted_parts AS (
+        DELETE FROM parts
+        WHERE system_id = :system_id
+        AND name != 'Self'
+        RETURNING 1
+    )
+    SELECT
+        (SELECT COUNT(*) FROM deleted_relationships) AS relationships_deleted,
+        (SELECT COUNT(*) FROM deleted_journals) AS journals_deleted,
+        (SELECT COUNT(*) FROM deleted_parts) AS parts_deleted
+""")
+
+# The whole GET /system payload, built by Postgres in the same shape as
+# IFSSystem.to_dict() plus parts_count; no ORM objects are hydrated
+_SYSTEM_JSON_QUERY = text("""
+    SELECT json_build_object(
+        'id', s.id,
+        'user_id', s.user_id,
+        'parts', COALESCE((
+            SELECT json_object_agg(p.id, json_build_object(
+                'id', p.id,
+                'name', p.name,
+                'system_id', p.system_id,
+                'role', p.role,
+                'description', p.description,
+                'feelings', COALESCE(p.feelings, '[]'::jsonb),
+                'beliefs', COALESCE(p.beliefs, '[]'::jsonb),
+                'triggers', COALESCE(p.triggers, '[]'::jsonb),
+                'needs', COALESCE(p.needs, '[]'::jsonb),
+                'created_at', p.created_at,
+                'updated_at', p.updated_at
+            ))
+            FROM parts p WHERE p.system_id = s.id
+        ), '{}'::json),
+        'relationships', COALESCE((
+            SELECT json_object_agg(r.id, json_build_object(
+                'id', r.id,
+                'source_id', r.part1_id,
+                'target_id', r.part2_id,
+                'relationship_type', r.relationship_type,
+                'description', r.description,
+                'created_at', r.created_at
+            ))
+            FROM relationships r WHERE r.system_id = s.id
+        ), '{}'::json),
+        'journals', COALESCE((
+            SELECT json_object_agg(j.id, json_build_object(
+                'id', j.id,
+                'title', j.title,
+                'content', j.content,
+                'date', j.date,
+                'created_at', j.created_at,
+                'updated_at', j.updated_at,
+                'part_id', j.part_id,
+                'metadata', j.journal_metadata
+            ))
+            FROM journals j WHERE j.system_id = s.id
+        ), '{}'::json),
+        'created_at', s.created_at,
+        'parts_count', (SELECT count(*) FROM parts p WHERE p.system_id = s.id)
+    )::text
+    FROM ifs_systems s
+    WHERE s.user_id = :user_id
+""")
+
+def _system_with_collections(user_id):
+    """Load the user's system with its parts, relationships and journals eager-loaded.
+    
+    Args:
+        user_id: ID of the system's owner.
+        
+    Returns:
+        IFSSystem or None: The system, ready for to_dict(). Lazy loads of any other
+        relationship on these objects raise instead of querying.
+    """
+    return db.session.execute(
+        db.select(IFSSystem)
+        .options(
+            selectinload(IFSSystem.parts).raiseload('*'),
+            selectinload(IFSSystem.relationships).raiseload('*'),
+            selectinload(IFSSystem.journals).raiseload('*'),
+            # Any other relationship touched while serializing is an N+1 regression
+            raiseload('*'),
+        )
+        .where(IFSSystem.user_id == user_id)
+    ).scalar_one_or_none()
+
 @systems_bp.route('/system', methods=['GET'])
 @auth_required
 def get_system():
@@ -29,21 +137,23 @@ def get_system():
     """
     try:
         user_id = g.current_user['id'] if hasattr(g, 'current_user') else get_jwt_identity()
-        system = IFSSystem.query.filter_by(user_id=user_id).first()
+        payload = db.session.execute(_SYSTEM_JSON_QUERY, {"user_id": user_id}).scalar()
         
         # Create a system if it doesn't exist
-        if not system:
+        if payload is None:
             logger.info(f"Creating new system for user {user_id}")
-            system = IFSSystem(
-                user_id=user_id,
-                # Remove name/description as they don't exist on the model
-                # name="My IFS System",  
-                # description="Default IFS system"
-            )
-            
-            # Add and commit the system ONLY. Do NOT create default parts here.
-            db.session.add(system)
+            # Upsert the system ONLY. Do NOT create default parts here.
+            # ON CONFLICT keeps concurrent first requests (e.g. two tabs) from
+            # creating two systems; the loser just gets the winner's ID back.
+            system_id = db.session.execute(
+                pg_insert(IFSSystem)
+                .values(user_id=user_id)
+                .on_conflict_do_update(index_elements=['user_id'], set_={'user_id': user_id})
+                .returning(IFSSystem.id)
+            ).scalar_one()
             db.session.commit()
+            remember_system_id(user_id, system_id)
+            payload = db.session.execute(_SYSTEM_JSON_QUERY, {"user_id": user_id}).scalar()
             
             # --- REMOVED DEFAULT SELF PART CREATION --- 
             # self_part = Part(...)
@@ -51,17 +161,11 @@ def get_system():
             # db.session.commit()
             # --- END REMOVAL --- 
             
-            logger.info(f"Created new system with ID {system.id} for user {user_id}")
+            logger.info(f"Created new system with ID {system_id} for user {user_id}")
         else:
             logger.info(f"Retrieved existing system for user {user_id}")
         
-        # Get parts count
-        parts_count = Part.query.filter_by(system_id=str(system.id)).count()
-        
-        system_data = system.to_dict()
-        system_data['parts_count'] = parts_count
-        
-        return jsonify(system_data)
+        return current_app.response_class(payload, mimetype='application/json')
         
     except Exception as e:
         db.session.rollback()
@@ -77,17 +181,21 @@ def update_system():
         JSON response with the updated system.
     """
     try:
+        data = request.get_json(cache=True) or {}
         user_id = g.current_user['id'] if hasattr(g, 'current_user') else get_jwt_identity()
         system = IFSSystem.query.filter_by(user_id=user_id).first()
         
         if not system:
             logger.error(f"System not found for user {user_id}")
-            return jsonify({"error": "System not found"}), 404
+            return error_response(SYSTEM_NOT_FOUND, 404)
         
         # Validate incoming data
+        errors = check_required_strings(data, ('name',))
+        if errors:
+            logger.warning(f"Validation error: {errors}")
+            return jsonify({"error": "Validation failed", "details": errors}), 400
         try:
-            data = request.json
-            SystemSchema().load(data)
+            data = _system_schema.load(data)
         except ValidationError as e:
             logger.warning(f"Validation error: {e.messages}")
             return jsonify({"error": "Validation failed", "details": e.messages}), 400
@@ -121,46 +229,20 @@ def get_system_overview():
     """
     try:
         user_id = g.current_user['id'] if hasattr(g, 'current_user') else get_jwt_identity()
-        system = IFSSystem.query.filter_by(user_id=user_id).first()
+        system = _system_with_collections(user_id)
         
         if not system:
             # Create a system if it doesn't exist
             return get_system()
         
-        # Get parts
-        parts = Part.query.filter_by(system_id=str(system.id)).all()
-        parts_count = len(parts)
-        
-        # Get relationships count using raw SQL for efficiency
-        relationships_count_query = db.session.execute(
-            """
-            SELECT COUNT(*) 
-            FROM relationship r
-            JOIN part p1 ON r.part1_id = p1.id
-            JOIN part p2 ON r.part2_id = p2.id
-            WHERE p1.system_id = :system_id AND p2.system_id = :system_id
-            """,
-            {"system_id": str(system.id)}
-        )
-        relationships_count = relationships_count_query.scalar() or 0
-        
-        # Get journal entries count
-        journals_count_query = db.session.execute(
-            """
-            SELECT COUNT(*)
-            FROM journal
-            WHERE system_id = :system_id
-            """,
-            {"system_id": str(system.id)}
-        )
-        journals_count = journals_count_query.scalar() or 0
-        
+        # Everything the overview needs is in the eager-loaded collections
         system_data = system.to_dict()
         system_data.update({
-            "parts_count": parts_count,
-            "relationships_count": relationships_count,
-            "journals_count": journals_count,
-            "parts": [part.to_dict() for part in parts]
+            "parts_count": len(system.parts),
+            "relationships_count": len(system.relationships),
+            "journals_count": len(system.journals),
+            # Same dicts to_dict() already built, in list form
+            "parts": list(system_data['parts'].values())
         })
         
         logger.info(f"Retrieved system overview for user {user_id}")
@@ -180,44 +262,21 @@ def reset_system():
     """
     try:
         user_id = g.current_user['id'] if hasattr(g, 'current_user') else get_jwt_identity()
-        system = IFSSystem.query.filter_by(user_id=user_id).first()
+        system_id = get_system_id_for_user(user_id)
         
-        if not system:
+        if not system_id:
             logger.error(f"System not found for user {user_id}")
-            return jsonify({"error": "System not found"}), 404
-        
-        # Delete relationships (will be cascaded but doing explicitly for logging)
-        db.session.execute(
-            """
-            DELETE FROM relationship
-            WHERE part1_id IN (SELECT id FROM part WHERE system_id = :system_id)
-            OR part2_id IN (SELECT id FROM part WHERE system_id = :system_id)
-            """,
-            {"system_id": str(system.id)}
-        )
-        
-        # Delete journals
-        db.session.execute(
-            """
-            DELETE FROM journal
-            WHERE system_id = :system_id
-            """,
-            {"system_id": str(system.id)}
-        )
+            return error_response(SYSTEM_NOT_FOUND, 404)
         
-        # Delete all parts except "Self"
-        db.session.execute(
-            """
-            DELETE FROM part
-            WHERE system_id = :system_id
-            AND name != 'Self'
-            """,
-            {"system_id": str(system.id)}
-        )
+        # Delete relationships, journals and all parts except "Self" in one round trip
+        deleted = db.session.execute(_RESET_SYSTEM_SQL, {"system_id": system_id}).one()
         
         db.session.commit()
         
-        logger.info(f"Reset system for user {user_id}")
+        logger.info(
+            f"Reset system for user {user_id}: deleted {deleted.parts_deleted} parts, "
+            f"{deleted.relationships_deleted} relationships, {deleted.journals_deleted} journals"
+        )
         return jsonify({
             "success": True,
             "message": "System has been reset. All parts (except Self), relationships, and journal entries have been deleted."
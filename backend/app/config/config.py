@@ -1,7 +1,10 @@
 import os
 from datetime import timedelta
+from functools import lru_cache
 from typing import List, Optional
-from urllib.parse import quote_plus, urlparse, urlunparse
+from urllib.parse import quote_plus
+
+from sqlalchemy.pool import NullPool
 
 # Database URL configuration function
 def get_db_url():
@@ -11,50 +14,79 @@ def get_db_url():
     if not db_url:
         return None
     
+    return _normalize_db_url(db_url)
+
+# Keyed on the raw URL, so a changed DATABASE_URL is still picked up
+@lru_cache(maxsize=4)
+def _normalize_db_url(db_url):
+    """Rewrite a DATABASE_URL for SQLAlchemy, URL-encoding the password."""
     # Fix for SQLAlchemy 1.4+ which requires 'postgresql://' instead of 'postgres://'
     if db_url.startswith('postgres://'):
         db_url = db_url.replace('postgres://', 'postgresql://', 1)
     
     if db_url.startswith('postgresql://'):
-        # Parse the URL to extract components
-        parsed = urlparse(db_url)
-        userinfo = parsed.netloc.split('@')[0]
+        # Locate the credentials with bounded finds instead of urlparse + splits.
+        # rfind so an unencoded '@' in the password stays part of the password.
+        start = len('postgresql://')
+        at = db_url.rfind('@', start)
+        colon = db_url.find(':', start, at) if at != -1 else -1
         
         # If URL contains password
-        if ':' in userinfo:
-            username, password = userinfo.split(':')
-            # URL encode the password
-            encoded_password = quote_plus(password)
-            # Reconstruct the URL
-            host_port = parsed.netloc.split('@')[1]
-            return f"postgresql://{username}:{encoded_password}@{host_port}{parsed.path}"
+        if colon != -1:
+            # URL encode the password, keep everything else (host, port, path, query) as-is
+            encoded_password = quote_plus(db_url[colon + 1:at])
+            return f"{db_url[:colon + 1]}{encoded_password}{db_url[at:]}"
             
     return db_url
 
+# Environment snapshot read by the config class bodies below; they are evaluated
+# once at import, so later changes to os.environ need a restart either way
+_ENV = dict(os.environ)
+
 class Config:
     """Base configuration."""
     # Flask settings
-    SECRET_KEY = os.environ.get('SECRET_KEY', 'default-flask-secret-key-change-me')
+    SECRET_KEY = _ENV.get('SECRET_KEY', 'default-flask-secret-key-change-me')
     
     # JWT settings
-    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'dev-secret-key-change-in-production')
+    JWT_SECRET_KEY = _ENV.get('JWT_SECRET_KEY', 'dev-secret-key-change-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
     
     # Database settings
     SQLALCHEMY_DATABASE_URI = get_db_url()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Behind a transaction-mode pgbouncer (e.g. the Supabase pooler on 6543) pooling
+    # is left to pgbouncer; otherwise keep a local pool sized for concurrent requests,
+    # with pre-ping/recycle so connections dropped on idle timeout aren't handed out.
+    # The pool is per process and a request holds one connection at a time, so it is
+    # sized to the gunicorn thread count; total connections are roughly
+    # workers * (pool_size + max_overflow) and must stay under the server's limit.
+    SQLALCHEMY_ENGINE_OPTIONS = (
+        {"poolclass": NullPool, "pool_pre_ping": True}
+        if _ENV.get('DB_PGBOUNCER', 'false').lower() == 'true'
+        else {
+            "pool_size": int(_ENV.get('DB_POOL_SIZE', _ENV.get('GUNICORN_THREADS', 4))),
+            "max_overflow": int(_ENV.get('DB_MAX_OVERFLOW', 4)),
+            # Fail fast rather than queueing requests behind a starved pool
+            "pool_timeout": int(_ENV.get('DB_POOL_TIMEOUT', 10)),
+            "pool_pre_ping": True,
+            "pool_recycle": 1800,
+        }
+    )
+    # Register Flask-Migrate (and import Alembic); web workers can turn this off
+    ENABLE_MIGRATIONS = _ENV.get('ENABLE_MIGRATIONS', 'true').lower() == 'true'
     
     # CORS settings
-    CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:3000,http://127.0.0.1:3000').split(',')
+    CORS_ORIGINS = tuple(_ENV.get('CORS_ORIGINS', 'http://localhost:3000,http://127.0.0.1:3000').split(','))
     
     # Logging
-    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_LEVEL = _ENV.get('LOG_LEVEL', 'INFO')
 
     # Stripe Configuration
-    STRIPE_PUBLISHABLE_KEY = os.getenv('STRIPE_PUBLISHABLE_KEY')
-    STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY')
-    STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET') # From Stripe Dashboard Webhook settings
+    STRIPE_PUBLISHABLE_KEY = _ENV.get('STRIPE_PUBLISHABLE_KEY')
+    STRIPE_SECRET_KEY = _ENV.get('STRIPE_SECRET_KEY')
+    STRIPE_WEBHOOK_SECRET = _ENV.get('STRIPE_WEBHOOK_SECRET') # From Stripe Dashboard Webhook settings
 
 
 class DevelopmentConfig(Config):
@@ -68,6 +100,9 @@ class TestingConfig(Config):
     DEBUG = True
     # Use in-memory SQLite for testing
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    # SQLite's in-memory pool takes no sizing options
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    ENABLE_MIGRATIONS = False
     
 
 class ProductionConfig(Config):
@@ -78,14 +113,9 @@ class ProductionConfig(Config):
     SESSION_COOKIE_SECURE = True
     REMEMBER_COOKIE_SECURE = True
     
-    # Set strict CORS in production
-    @property
-    def CORS_ORIGINS(self) -> List[str]:
-        origins = os.environ.get('CORS_ORIGINS', '').split(',')
-        if not origins or origins == ['']:
-            # Fallback to specific domains if not configured
-            return ['https://ifscenter.netlify.app']
-        return origins
+    # Set strict CORS in production, falling back to specific domains if not configured.
+    # A plain class attribute (a property isn't evaluated by app.config.from_object).
+    CORS_ORIGINS = tuple(filter(None, _ENV.get('CORS_ORIGINS', '').split(','))) or ('https://ifscenter.netlify.app',)
 
 
 # Configuration dictionary
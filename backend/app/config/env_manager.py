@@ -3,11 +3,19 @@ Environment configuration manager.
 Handles loading different environment configurations based on FLASK_ENV.
 """
 import os
-from dotenv import load_dotenv
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _mask_db_url(db_url):
+    """Replace the password in a database URL with '***' for logging."""
+    credentials, at, host = db_url.rpartition('@')
+    if not at:
+        return db_url
+    scheme, _, userinfo = credentials.partition('://')
+    username = userinfo.partition(':')[0]
+    return f"{scheme}://{username}:***@{host}"
+
 def load_environment():
     """
     Load the appropriate environment file based on FLASK_ENV.
@@ -26,11 +34,6 @@ def load_environment():
     env = os.environ.get('FLASK_ENV', 'development')
     logger.info(f"Loading environment configuration for: {env}")
     
-    # Always load shared environment first
-    if os.path.isfile('.env.shared'):
-        load_dotenv('.env.shared')
-        logger.info("Loaded shared environment from .env.shared")
-    
     # Define env files to try in order of priority
     env_files = [
         f".env.{env}.local",  # highest priority
@@ -38,14 +41,32 @@ def load_environment():
         ".env.local",
         ".env"                # lowest priority
     ]
+    candidates = {'.env.shared', *env_files}
+    
+    # One directory scan instead of a stat() per candidate file
+    with os.scandir('.') as entries:
+        present = {entry.name for entry in entries if entry.name in candidates and entry.is_file()}
+    
+    # Only import python-dotenv when there is a file for it to parse
+    # (production containers usually rely on real environment variables)
+    if present:
+        from dotenv import dotenv_values
+    
+    # Merge the env files lowest priority first so higher-priority values win,
+    # then apply them to os.environ in one update (overriding the process env)
+    loaded_files = [env_file for env_file in env_files if env_file in present]
+    merged = {}
+    for env_file in reversed(loaded_files):
+        merged.update(dotenv_values(env_file))
+    os.environ.update({key: value for key, value in merged.items() if value is not None})
+    
+    # Shared environment only fills in what nothing else set
+    if '.env.shared' in present:
+        for key, value in dotenv_values('.env.shared').items():
+            if value is not None:
+                os.environ.setdefault(key, value)
+        logger.info("Loaded shared environment from .env.shared")
     
-    # Try to load each env file in order
-    loaded_files = []
-    for env_file in env_files:
-        if os.path.isfile(env_file):
-            load_dotenv(env_file, override=True)
-            loaded_files.append(env_file)
-            
     if loaded_files:
         logger.info(f"Loaded environment from: {', '.join(loaded_files)}")
     else:
@@ -62,8 +83,7 @@ def load_environment():
     db_url = os.environ.get('DATABASE_URL', 'Not set')
     if db_url != 'Not set':
         # Hide credentials in logs
-        masked_db_url = db_url.split('@')[0].split('://')[0] + '://' + db_url.split('@')[0].split('://')[1].split(':')[0] + ':***@' + db_url.split('@')[1]
-        logger.info(f"Using database: {masked_db_url}")
+        logger.info(f"Using database: {_mask_db_url(db_url)}")
     
     if 'SUPABASE_URL' in os.environ:
         logger.info(f"Supabase configuration found: {os.environ.get('SUPABASE_URL')}")
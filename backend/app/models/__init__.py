@@ -2,11 +2,9 @@
 Models package that defines the database schema.
 """
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 
-# Initialize SQLAlchemy
+# Initialize SQLAlchemy (engine/pool options come from Config.SQLALCHEMY_ENGINE_OPTIONS)
 db = SQLAlchemy()
-migrate = Migrate()
 
 # Import models to ensure they are registered by SQLAlchemy
 from .user import User
@@ -16,5 +14,16 @@ from .relationship import Relationship
 from .journal import Journal
 from .conversation import GuidedSession, SessionMessage, PartConversation, ConversationMessage, PartPersonalityVector
 
+def __getattr__(name):
+    """Create the Flask-Migrate extension on first access (PEP 562).
+    
+    Keeps flask_migrate (and Alembic behind it) out of processes that never run migrations.
+    """
+    if name == 'migrate':
+        from flask_migrate import Migrate
+        globals()['migrate'] = Migrate()
+        return globals()['migrate']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 __all__ = ['db', 'migrate', 'User', 'Part', 'Relationship', 'Journal', 'IFSSystem',
            'GuidedSession', 'SessionMessage', 'PartConversation', 'ConversationMessage', 'PartPersonalityVector'] 
\ No newline at end of file
@@ -2,21 +2,22 @@
 Models for guided IFS sessions, messages, and related vector embeddings.
 Includes deprecated models for old part conversations.
 """
-import datetime
 from uuid import uuid4
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any
 
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, func, CheckConstraint
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, CheckConstraint, Index
 from sqlalchemy.sql import func as sql_func
-from sqlalchemy.dialects.postgresql import UUID, ARRAY, FLOAT, JSONB
-from sqlalchemy.orm import relationship
-from sqlalchemy.ext.mutable import MutableList
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship, deferred
 
 # Import pgvector extension types
 from pgvector.sqlalchemy import Vector
 
 from . import db
 
+# One shared now() expression for every server default / onupdate in this module
+_NOW = sql_func.now()
+
 # --- New Models for Guided Sessions ---
 
 class GuidedSession(db.Model):
@@ -29,8 +30,8 @@ class GuidedSession(db.Model):
     title = Column(Text, nullable=True)
     summary = Column(Text, nullable=True)
     topic = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=sql_func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=sql_func.now(), onupdate=sql_func.now())
+    created_at = Column(DateTime(timezone=True), server_default=_NOW)
+    updated_at = Column(DateTime(timezone=True), server_default=_NOW, onupdate=_NOW)
     status = Column(String, default='active') # e.g., 'active', 'archived'
     current_focus_part_id = Column(UUID(as_uuid=True), ForeignKey('parts.id', ondelete='SET NULL'), nullable=True)
 
@@ -40,8 +41,10 @@ class GuidedSession(db.Model):
     system = relationship('IFSSystem') # Assuming IFSSystem model exists
     current_focus_part = relationship('Part') # Assuming Part model exists
 
+    # lazy='raise': load messages with an explicit, paginated query on session_id.
+    # passive_deletes lets the ON DELETE CASCADE remove them without loading them first.
     messages = relationship('SessionMessage', back_populates='session',
-                          cascade='all, delete-orphan', lazy='dynamic',
+                          cascade='all, delete-orphan', lazy='raise', passive_deletes=True,
                           order_by='SessionMessage.timestamp')
 
     def to_dict(self) -> Dict[str, Any]:
@@ -67,10 +70,11 @@ class SessionMessage(db.Model):
     session_id = Column(UUID(as_uuid=True), ForeignKey('guided_sessions.id', ondelete='CASCADE'), nullable=False)
     role = Column(String(50), nullable=False)  # 'user' or 'guide'
     content = Column(Text, nullable=False)
-    timestamp = Column(DateTime(timezone=True), server_default=sql_func.now())
+    timestamp = Column(DateTime(timezone=True), server_default=_NOW)
 
-    # Vector embedding for the message content
-    embedding = Column(Vector(384), nullable=True) # Ensure dimension matches model
+    # Vector embedding for the message content.
+    # Deferred: to_dict() never includes it, so message listings skip loading 384 floats per row
+    embedding = deferred(Column(Vector(384), nullable=True)) # Ensure dimension matches model
 
     # Relationships
     session = relationship('GuidedSession', back_populates='messages')
@@ -78,6 +82,8 @@ class SessionMessage(db.Model):
     # Add check constraint for role
     __table_args__ = (
         CheckConstraint(role.in_(['user', 'guide']), name='session_message_role_check'),
+        # Message history for a session, in timestamp order
+        Index('ix_session_messages_session_ts', 'session_id', 'timestamp'),
     )
 
     def to_dict(self) -> Dict[str, Any]:
@@ -101,17 +107,17 @@ class PartConversation(db.Model):
     system_id = Column(UUID(as_uuid=True), ForeignKey('ifs_systems.id', ondelete='CASCADE'), nullable=False) # Added FK for consistency
     title = Column(String(255), nullable=True)
     summary = Column(Text, nullable=True) # Added summary field
-    created_at = Column(DateTime(timezone=True), server_default=sql_func.now()) # Corrected
-    updated_at = Column(DateTime(timezone=True), server_default=sql_func.now(), onupdate=sql_func.now()) # Corrected
+    created_at = Column(DateTime(timezone=True), server_default=_NOW) # Corrected
+    updated_at = Column(DateTime(timezone=True), server_default=_NOW, onupdate=_NOW) # Corrected
     status = Column(String, default='active') # Added status field
 
     # Relationships
     part_id = Column(UUID(as_uuid=True), ForeignKey('parts.id', ondelete='CASCADE'), nullable=False)
-    part = relationship('Part') # Removed back_populates as Part model doesn't define it
+    part = relationship('Part', back_populates='conversations') # Pairs with Part.conversations
 
     # Relationship to messages
     messages = relationship('ConversationMessage', back_populates='conversation',
-                          cascade='all, delete-orphan', lazy='dynamic',
+                          cascade='all, delete-orphan', lazy='raise', passive_deletes=True,
                           order_by='ConversationMessage.timestamp') # Changed alias
 
     def to_dict(self) -> Dict[str, Any]:
@@ -134,10 +140,10 @@ class ConversationMessage(db.Model):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     role = Column(String(50), nullable=False)  # 'user' or 'part'/'assistant'
     content = Column(Text, nullable=False)
-    timestamp = Column(DateTime(timezone=True), server_default=sql_func.now()) # Corrected
+    timestamp = Column(DateTime(timezone=True), server_default=_NOW) # Corrected
 
-    # Vector embedding for the message content
-    embedding = Column(Vector(384), nullable=True)
+    # Vector embedding for the message content (deferred, not part of to_dict())
+    embedding = deferred(Column(Vector(384), nullable=True))
 
     # Relationships
     conversation_id = Column(UUID(as_uuid=True),
@@ -163,9 +169,9 @@ class PartPersonalityVector(db.Model):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     attribute = Column(String(100), nullable=False) # Renamed from aspect, increased length
     description = Column(Text, nullable=True) # Added description field
-    embedding = Column(Vector(384), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=sql_func.now()) # Corrected
-    updated_at = Column(DateTime(timezone=True), server_default=sql_func.now(), onupdate=sql_func.now()) # Corrected
+    embedding = deferred(Column(Vector(384), nullable=False))
+    created_at = Column(DateTime(timezone=True), server_default=_NOW) # Corrected
+    updated_at = Column(DateTime(timezone=True), server_default=_NOW, onupdate=_NOW) # Corrected
 
     # Relationships
     part_id = Column(UUID(as_uuid=True), ForeignKey('parts.id', ondelete='CASCADE'), nullable=False)
@@ -2,15 +2,29 @@
 Journal model for user reflections and notes.
 """
 from uuid import uuid4
-from typing import Dict, Any, Optional
+from typing import Optional, TypedDict
 
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, func
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func as sql_func
 
 from . import db
 
+# Shared now() expression for the timestamp columns below
+_NOW = sql_func.now()
+
+class JournalDict(TypedDict):
+    """Serialized form of a Journal, as returned by Journal.to_dict()."""
+    id: str
+    title: str
+    content: Optional[str]
+    date: Optional[str]
+    created_at: Optional[str]
+    updated_at: Optional[str]
+    part_id: Optional[str]
+    metadata: Optional[str]
+
 class Journal(db.Model):
     """Model for journal entries in an IFS system."""
     __tablename__ = 'journals'
@@ -18,9 +32,9 @@ class Journal(db.Model):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     title = Column(String(200), nullable=False)
     content = Column(Text)
-    date = Column(DateTime, server_default=sql_func.now())
-    created_at = Column(DateTime, server_default=sql_func.now())
-    updated_at = Column(DateTime, server_default=sql_func.now(), onupdate=sql_func.now())
+    date = Column(DateTime, server_default=_NOW)
+    created_at = Column(DateTime, server_default=_NOW)
+    updated_at = Column(DateTime, server_default=_NOW, onupdate=_NOW)
     journal_metadata = Column(Text)  # For storing emotions, parts_present, and other flexible data
     
     # Relationships
@@ -29,6 +43,7 @@ class Journal(db.Model):
     
     # Relationship to part (optional)
     part = relationship('Part', back_populates='journals', lazy=True)
+    system = relationship('IFSSystem', back_populates='journals')
     
     def __init__(self, title: str, system_id: str, content: str = "", 
                  part_id: Optional[str] = None, journal_metadata: str = ""):
@@ -47,7 +62,7 @@ class Journal(db.Model):
         self.system_id = system_id
         self.journal_metadata = journal_metadata
         
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self) -> JournalDict:
         """Convert journal to dictionary representation.
         
         Returns:
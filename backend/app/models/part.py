@@ -2,25 +2,32 @@
 Part model for IFS parts.
 """
 import datetime
-from uuid import uuid4
+from uuid import uuid4, UUID as PyUUID
 from typing import Dict, Any, List, Optional
-import ast
-import logging
 
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, func
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Index, func, text
 from sqlalchemy.sql import func as sql_func
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 
 from . import db
 
-logger = logging.getLogger(__name__)
+# The Self part every system starts with (the 8 Cs and the core belief)
+SELF_PART_DESCRIPTION = "The centered, compassionate Self that is the goal of IFS therapy."
+SELF_PART_FEELINGS = ("Calm", "curious", "compassionate", "connected", "clear", "confident", "creative", "courageous")
+SELF_PART_BELIEFS = ("All parts are welcome. I can hold space for all experiences.",)
 
 class Part(db.Model):
     """Model representing an IFS part."""
     __tablename__ = 'parts'
+    __table_args__ = (
+        # Parts are almost always looked up by system (and the Self part by name)
+        Index('ix_parts_system_id_name', 'system_id', 'name', postgresql_include=['id']),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    # uuid4 for ORM/Core inserts (no RETURNING needed); the server default covers
+    # rows inserted through the Supabase REST API without an id
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4, server_default=text('gen_random_uuid()'))
     name = Column(String(100), nullable=False)
     role = Column(String(50))
     description = Column(Text)
@@ -38,6 +45,7 @@ class Part(db.Model):
     system_id = Column(UUID(as_uuid=True), ForeignKey('ifs_systems.id'), nullable=False)
     
     # Set up relationships for easier querying
+    system = relationship('IFSSystem', back_populates='parts')
     journals = relationship('Journal', back_populates='part', lazy=True)
     
     # Conversation relationships
@@ -48,7 +56,7 @@ class Part(db.Model):
     source_relationships = relationship(
         'Relationship', 
         foreign_keys='Relationship.part1_id',
-        backref='source',
+        back_populates='source',
         lazy=True,
         cascade='all, delete-orphan'
     )
@@ -56,7 +64,7 @@ class Part(db.Model):
     target_relationships = relationship(
         'Relationship', 
         foreign_keys='Relationship.part2_id',
-        backref='target',
+        back_populates='target',
         lazy=True,
         cascade='all, delete-orphan'
     )
@@ -87,40 +95,39 @@ class Part(db.Model):
         self.needs = needs or []
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert part to dictionary representation, ensuring lists are parsed."""
-        
-        part_data = {
+        """Convert part to dictionary representation; NULL list columns become []."""
+        return {
             "id": str(self.id),
             "name": self.name,
             "system_id": str(self.system_id),
             "role": self.role,
             "description": self.description,
-            "feelings": self.feelings,
-            "beliefs": self.beliefs,
-            "triggers": self.triggers,
-            "needs": self.needs,
+            "feelings": self.feelings or [],
+            "beliefs": self.beliefs or [],
+            "triggers": self.triggers or [],
+            "needs": self.needs or [],
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
-
-        # Parse list-like fields that might be strings
-        list_fields = ['feelings', 'beliefs', 'triggers', 'needs']
-        for field in list_fields:
-            if field in part_data and isinstance(part_data[field], str):
-                try:
-                    parsed_value = ast.literal_eval(part_data[field])
-                    if isinstance(parsed_value, list):
-                        part_data[field] = parsed_value
-                    else:
-                        logger.warning(f"Parsed field '{field}' for part {part_data['id']} but result was not a list: {parsed_value}. Keeping original string.")
-                except (ValueError, SyntaxError, TypeError) as parse_error:
-                    logger.warning(f"Could not parse string field '{field}' for part {part_data['id']}: {part_data[field]}. Error: {parse_error}. Setting to empty list.")
-                    part_data[field] = []
-            elif field in part_data and part_data[field] is None:
-                # Ensure None values become empty lists for consistency
-                part_data[field] = []
-
-        return part_data
+    
+    @classmethod
+    def create_self(cls, system_id: PyUUID) -> 'Part':
+        """Create the default Self part for a system.
+        
+        Args:
+            system_id: UUID of the system the part belongs to.
+            
+        Returns:
+            New Self part; its list fields are fresh copies of the defaults.
+        """
+        return cls(
+            name="Self",
+            system_id=system_id,
+            role="Self",
+            description=SELF_PART_DESCRIPTION,
+            feelings=list(SELF_PART_FEELINGS),
+            beliefs=list(SELF_PART_BELIEFS)
+        )
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any], system_id: str) -> 'Part':
@@ -4,7 +4,7 @@ Relationship model for connections between IFS parts.
 from uuid import uuid4
 from typing import Dict, Any
 
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, func
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, UniqueConstraint, Index, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func as sql_func
@@ -14,8 +14,15 @@ from . import db
 class Relationship(db.Model):
     """Model representing a relationship between IFS parts."""
     __tablename__ = 'relationships'
+    __table_args__ = (
+        # A pair of parts can only be related once per direction
+        UniqueConstraint('system_id', 'part1_id', 'part2_id', name='ux_relationships_system_part1_part2'),
+        # Part deletes and Part.source/target_relationships filter on a single part id
+        Index('ix_relationships_part1_id', 'part1_id'),
+        Index('ix_relationships_part2_id', 'part2_id'),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4, server_default=text('gen_random_uuid()'))
     # Use part1_id and part2_id as they exist in Supabase
     part1_id = Column(UUID(as_uuid=True), ForeignKey('parts.id'), nullable=False)
     part2_id = Column(UUID(as_uuid=True), ForeignKey('parts.id'), nullable=False)
@@ -26,6 +33,12 @@ class Relationship(db.Model):
     
     # The system this relationship belongs to
     system_id = Column(UUID(as_uuid=True), ForeignKey('ifs_systems.id'), nullable=False)
+    system = relationship('IFSSystem', back_populates='relationships')
+    
+    # Reverse sides of Part.source_relationships/target_relationships. Nothing
+    # serializes them, so raise instead of silently lazy-loading a Part per row.
+    source = relationship('Part', foreign_keys=[part1_id], back_populates='source_relationships', lazy='raise')
+    target = relationship('Part', foreign_keys=[part2_id], back_populates='target_relationships', lazy='raise')
     
     def __init__(self, source_id: str, target_id: str, relationship_type: str, 
                  system_id: str, description: str = ""):
@@ -4,7 +4,7 @@ IFSSystem model to represent a user's internal family system.
 from uuid import uuid4
 from typing import Dict, Any, List, Optional
 
-from sqlalchemy import Column, String, DateTime, ForeignKey, func, Text
+from sqlalchemy import Column, String, DateTime, ForeignKey, func, Text, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -15,14 +15,16 @@ class IFSSystem(db.Model):
     """Model representing a user's internal family system."""
     __tablename__ = 'ifs_systems'
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4, server_default=text('gen_random_uuid()'))
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False, unique=True)  # One system per user
     created_at = Column(DateTime, server_default=func.now())
     
-    # Relationships
-    parts = relationship('Part', backref='system', lazy=True, cascade='all, delete-orphan')
-    relationships = relationship('Relationship', backref='system', lazy=True, cascade='all, delete-orphan')
-    journals = relationship('Journal', backref='system', lazy=True, cascade='all, delete-orphan')
+    # Relationships (explicit back_populates so loader options can target either side)
+    parts = relationship('Part', back_populates='system', lazy='select', cascade='all, delete-orphan')
+    relationships = relationship('Relationship', back_populates='system', lazy='select', cascade='all, delete-orphan')
+    journals = relationship('Journal', back_populates='system', lazy='select', cascade='all, delete-orphan')
+    # Owner is always known from the request; never load it implicitly
+    user = relationship('User', back_populates='systems', lazy='raise')
     
     def __init__(self, user_id: str, name: str = None, description: str = None):
         """Initialize a new IFS system.
@@ -42,17 +44,11 @@ class IFSSystem(db.Model):
         Returns:
             Dictionary containing all system data, including parts and relationships.
         """
-        parts_dict = {}
-        for part in self.parts:
-            parts_dict[str(part.id)] = part.to_dict()
-            
-        relationships_dict = {}
-        for rel in self.relationships:
-            relationships_dict[str(rel.id)] = rel.to_dict()
-            
-        journals_dict = {}
-        for journal in self.journals:
-            journals_dict[str(journal.id)] = journal.to_dict()
+        # Key each collection by the "id" string to_dict() already produced
+        # rather than formatting every UUID a second time
+        parts_dict = {(d := part.to_dict())["id"]: d for part in self.parts}
+        relationships_dict = {(d := rel.to_dict())["id"]: d for rel in self.relationships}
+        journals_dict = {(d := journal.to_dict())["id"]: d for journal in self.journals}
             
         result = {
             "id": str(self.id),
@@ -8,20 +8,28 @@ from datetime import date # Import date for Date type hint
 
 from passlib.hash import bcrypt
 # Import Integer and Date
-from sqlalchemy import Column, String, DateTime, func, Integer, Date 
+from sqlalchemy import Column, String, DateTime, func, Integer, Date, Index, text 
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 
 from . import db
 
+# Stored for users who never sign in with a local password (e.g. Supabase Auth);
+# it is not a valid bcrypt hash, so verify_password always fails for it
+UNUSABLE_PASSWORD = '!'
+
+# Cost pinned explicitly so it doesn't drift with passlib's default
+_password_hasher = bcrypt.using(rounds=12)
+
 class User(db.Model):
     """User model for authentication and authorization."""
     __tablename__ = 'users'
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4, server_default=text('gen_random_uuid()'))
     username = Column(String(80), unique=True, nullable=False)
     email = Column(String(120), unique=True, nullable=False)
-    password_hash = Column(String(128), nullable=False)
+    # Deferred: only login needs it, so profile/auth lookups don't fetch the hash
+    password_hash = deferred(Column(String(128), nullable=False))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Rename full_name to first_name
@@ -40,9 +48,10 @@ class User(db.Model):
     daily_journals_used = Column(Integer, nullable=False, default=0)
     last_journal_date = Column(Date, nullable=True)
 
-    systems = relationship('IFSSystem', backref='user', lazy=True, cascade='all, delete-orphan')
+    systems = relationship('IFSSystem', back_populates='user', lazy=True, cascade='all, delete-orphan')
     
-    def __init__(self, username: str, email: str, password: str, first_name: Optional[str] = None):
+    def __init__(self, username: str, email: str, password: Optional[str] = None,
+                 first_name: Optional[str] = None, password_hash: Optional[str] = None):
         """Initialize a new user.
         
         Args:
@@ -50,10 +59,12 @@ class User(db.Model):
             email: User's email address.
             password: Plain text password (will be hashed).
             first_name: Optional user's first name.
+            password_hash: Already-computed hash (or UNUSABLE_PASSWORD) to store
+                instead of hashing `password`.
         """
         self.username = username
         self.email = email
-        self.password_hash = bcrypt.hash(password)
+        self.password_hash = password_hash if password_hash is not None else _password_hasher.hash(password)
         self.first_name = first_name # Changed from full_name
     
     def verify_password(self, password: str) -> bool:
@@ -65,6 +76,8 @@ class User(db.Model):
         Returns:
             True if the password matches, False otherwise.
         """
+        if not bcrypt.identify(self.password_hash):
+            return False
         return bcrypt.verify(password, self.password_hash)
     
     def to_dict(self) -> Dict[str, Any]:
@@ -88,4 +101,7 @@ class User(db.Model):
         }
     
     def __repr__(self) -> str:
-        return f"<User {self.username}>" 
\ No newline at end of file
+        return f"<User {self.username}>"
+
+# Email lookups are case-insensitive (Supabase lowercases emails, older local rows may not)
+Index('ix_users_email_lower', func.lower(User.email)) 
\ No newline at end of file
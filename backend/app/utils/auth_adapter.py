@@ -8,23 +8,29 @@ import logging
 from typing import Dict, Any, Optional, Tuple
 from functools import wraps
 import uuid
+import hashlib
+import time
+from types import SimpleNamespace
 
+import jwt
 from flask import request, g, current_app, jsonify
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, create_access_token
 from werkzeug.local import LocalProxy
+from sqlalchemy import or_, func
 
 # Import supabase client properly for the package structure
 from backend.app.utils.supabase_client import supabase
+from backend.app.utils.cache import TTLCache
 from backend.app.models import db, User, IFSSystem, Part
+from backend.app.models.user import UNUSABLE_PASSWORD
 
 logger = logging.getLogger(__name__)
 
-# Set the logging level for detailed debugging
-logger.setLevel(logging.DEBUG)
-
 # Configuration
 use_supabase_auth = os.environ.get('SUPABASE_USE_FOR_AUTH', 'False').lower() == 'true'
-logger.debug(f"SUPABASE_USE_FOR_AUTH value: {use_supabase_auth}")
+logger.debug("SUPABASE_USE_FOR_AUTH value: %s", use_supabase_auth)
+# Project JWT secret; when set, HS256 access tokens are verified locally instead of via get_user
+supabase_jwt_secret = os.environ.get('SUPABASE_JWT_SECRET')
 
 # Add a function to check if Supabase is truly available
 def is_supabase_available():
@@ -42,19 +48,157 @@ def is_supabase_available():
         logger.warning("Supabase client not available, will use JWT authentication")
         return False
         
+    # Reuse a recent probe; the short TTL means a transient failure doesn't stick
+    cached = _supabase_probe.get('live')
+    if cached is not None:
+        return cached
+        
     # Try a simple test call to ensure it's working
     try:
         # Do a lightweight operation to test connectivity
         supabase.client.auth.get_session()
         logger.info("Supabase auth connection verified")
-        return True
+        live = True
     except Exception as e:
         logger.error(f"Supabase auth connection failed: {str(e)}")
-        return False
+        live = False
+    _supabase_probe.set('live', live)
+    return live
+
+# Result of the last is_supabase_available() connectivity probe
+_supabase_probe = TTLCache(maxsize=1, ttl=60)
+
+logger.info(f"Configured auth mode: {'Supabase' if use_supabase_auth and supabase.is_available() else 'JWT'}")
+
+# Users whose local row, IFSSystem and Self part were confirmed to exist recently.
+# Lets auth_required skip its bootstrap queries for returning users. No endpoint
+# deletes any of those rows (reset_system keeps Self), so the TTL only matters for
+# rows removed out of band.
+_bootstrapped_users = TTLCache(maxsize=5_000, ttl=300)
 
-# Determine whether to actually use Supabase based on availability
-should_use_supabase = use_supabase_auth and supabase.is_available()
-logger.info(f"Actual auth mode: {'Supabase' if should_use_supabase else 'JWT'}")
+# Supabase users from recent token verifications, keyed by a digest of the token
+# (never the raw token). Entries never outlive the token's own expiry.
+_verified_users = TTLCache(maxsize=10_000, ttl=60)
+
+def _get_supabase_user(token: str):
+    """Verify a Supabase access token, reusing a recent verification of the same token.
+    
+    With SUPABASE_JWT_SECRET set, HS256 tokens are checked locally and only tokens
+    the secret can't verify go to Supabase.
+    
+    Args:
+        token: Bearer token from the Authorization header.
+        
+    Returns:
+        The Supabase user object, or None if the token is invalid or expired.
+    """
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    cached_user = _verified_users.get(key)
+    if cached_user is not None:
+        return cached_user
+    
+    if supabase_jwt_secret:
+        try:
+            claims = jwt.decode(token, supabase_jwt_secret, algorithms=['HS256'], audience='authenticated')
+        except jwt.ExpiredSignatureError:
+            return None
+        except jwt.PyJWTError:
+            # Not verifiable with the shared secret (e.g. asymmetric signing keys); ask Supabase
+            pass
+        else:
+            # Same attributes callers use on the Supabase user object
+            return SimpleNamespace(
+                id=claims['sub'],
+                email=claims.get('email'),
+                user_metadata=claims.get('user_metadata') or {},
+            )
+    
+    # Unverified read of the exp claim. It can only reject a token early (Supabase
+    # still checks the signature of anything that passes), so an expired token
+    # never costs a round trip.
+    ttl = _verified_users.ttl
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get('exp')
+    except jwt.PyJWTError:
+        exp = None
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+        if ttl <= 0:
+            return None
+    
+    user_data = supabase.client.auth.get_user(token)
+    if not user_data or not user_data.user:
+        return None
+    
+    # Cache lifetime is bounded by the token's own expiry
+    if ttl > 0:
+        _verified_users.set(key, user_data.user, ttl=ttl)
+    return user_data.user
+
+def get_user_by_id(user_id) -> Optional[User]:
+    """Get a local user by primary key, checking the session's identity map first.
+    
+    Args:
+        user_id: ID of the user (string or UUID).
+        
+    Returns:
+        Optional[User]: The user, or None if missing or `user_id` isn't a valid UUID.
+    """
+    try:
+        # Identity-map keys are UUIDs, so a string id would always miss it
+        key = user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id))
+    except ValueError:
+        return None
+    return db.session.get(User, key)
+
+def _unique_username(base: str) -> str:
+    """Pick the first free username among base, base1, base2, ...
+    
+    Args:
+        base: Preferred username.
+        
+    Returns:
+        str: `base` itself if unused, otherwise it with the lowest free numeric suffix.
+    """
+    # One query for every existing name sharing the prefix instead of one per candidate
+    taken = set(db.session.execute(
+        db.select(User.username).where(User.username.startswith(base, autoescape=True))
+    ).scalars())
+    username = base
+    counter = 1
+    while username in taken:
+        username = f"{base}{counter}"
+        counter += 1
+    return username
+
+def _load_bootstrap_state(user_id: uuid.UUID, email: str) -> Tuple[Optional[User], Optional[uuid.UUID], bool]:
+    """Load what auth_required needs to bootstrap a Supabase user, in one query.
+    
+    Args:
+        user_id: Supabase user ID.
+        email: Supabase user email, used when no row has the ID.
+        
+    Returns:
+        Tuple of the local user (matched by ID if possible, else by email, else None),
+        the ID of that user's IFSSystem (or None) and whether the system has a Self part.
+    """
+    has_self_part = (
+        db.select(Part.id)
+        .where(Part.system_id == IFSSystem.id, Part.role == 'Self')
+        .exists()
+    )
+    row = db.session.execute(
+        db.select(User, IFSSystem.id, has_self_part)
+        .outerjoin(IFSSystem, IFSSystem.user_id == User.id)
+        # Emails match case-insensitively (served by ix_users_email_lower)
+        .where(or_(User.id == user_id, func.lower(User.email) == email.lower()))
+        # Prefer the row with the Supabase ID over one that only shares the email
+        .order_by((User.id == user_id).desc())
+        .limit(1)
+    ).first()
+    if row is None:
+        return None, None, False
+    return row[0], row[1], bool(row[2])
 
 def get_current_user() -> Optional[Dict[str, Any]]:
     """Get the current authenticated user.
@@ -79,33 +223,44 @@ def verify_token() -> Optional[Dict[str, Any]]:
     Returns:
         Optional[Dict[str, Any]]: User info dictionary (e.g., {'id': ..., 'email': ...}) or None if verification fails.
     """
-    if should_use_supabase:
+    # The header can't change within a request, so verify it at most once per request
+    if '_verified_token_claims' in g:
+        return g._verified_token_claims
+    g._verified_token_claims = _verify_token_uncached()
+    return g._verified_token_claims
+
+def _verify_token_uncached() -> Optional[Dict[str, Any]]:
+    """Verify the Authorization header without consulting the per-request result."""
+    # Both strategies need a Bearer header (JWT_TOKEN_LOCATION is headers only), so
+    # reject anything else before touching Supabase or raising inside flask_jwt_extended
+    auth_header = request.headers.get('Authorization')
+    logger.debug("verify_token: Auth header: %s", auth_header)
+    if not auth_header or not auth_header.startswith('Bearer '):
+        logger.error("verify_token: Missing or invalid authorization header")
+        return None
+    
+    # Checked per call (via the cached probe) so a client initialized after import is picked up
+    if is_supabase_available():
         # Use Supabase Auth strategy
         try:
-            auth_header = request.headers.get('Authorization')
-            logger.debug(f"verify_token: Auth header: {auth_header}")
-            if not auth_header or not auth_header.startswith('Bearer '):
-                logger.error("verify_token: Missing or invalid authorization header")
-                return None
-            
             token = auth_header.split(' ')[1]
             
             # Verify with Supabase
-            logger.debug(f"verify_token: Verifying token with Supabase: {token[:10]}...")
-            user_data = supabase.client.auth.get_user(token)
+            logger.debug("verify_token: Verifying token with Supabase: %.10s...", token)
+            supabase_user = _get_supabase_user(token)
             
-            if not user_data or not user_data.user:
+            if supabase_user is None:
                 logger.error("verify_token: Invalid or expired Supabase token")
                 return None
             
-            logger.debug(f"verify_token: Authenticated user: {user_data.user.email}")
+            logger.debug("verify_token: Authenticated user: %s", supabase_user.email)
             
             # Return relevant user info (using standard JWT claims where possible)
             return {
-                "sub": str(user_data.user.id), # 'sub' is standard claim for subject/user ID
-                "id": str(user_data.user.id),  # Include 'id' for compatibility
-                "email": user_data.user.email,
-                # Add any other claims you need from user_data.user or user_data.user.user_metadata
+                "sub": str(supabase_user.id), # 'sub' is standard claim for subject/user ID
+                "id": str(supabase_user.id),  # Include 'id' for compatibility
+                "email": supabase_user.email,
+                # Add any other claims you need from supabase_user or supabase_user.user_metadata
             }
         except Exception as e:
             logger.error(f"verify_token: Supabase auth error: {str(e)}")
@@ -116,7 +271,7 @@ def verify_token() -> Optional[Dict[str, Any]]:
             # This verifies the token is present, valid, and not expired
             verify_jwt_in_request() 
             user_id = get_jwt_identity()
-            logger.debug(f"verify_token: JWT verified, identity: {user_id}")
+            logger.debug("verify_token: JWT verified, identity: %s", user_id)
             # For JWT, we might only have the ID. Fetch other details if needed.
             # Here, we just return the ID as 'sub' and 'id'.
             return {
@@ -130,6 +285,161 @@ def verify_token() -> Optional[Dict[str, Any]]:
 
 # ====================================================
 
+def _extract_first_name(user_metadata: Dict[str, Any]) -> Optional[str]:
+    """Pick a first name out of Supabase user metadata.
+    
+    Args:
+        user_metadata: The user's metadata (from our registration or an OAuth provider).
+        
+    Returns:
+        Optional[str]: The first name, or None if the metadata doesn't carry one.
+    """
+    # Prioritize 'first_name' if explicitly set in metadata (e.g., from our registration)
+    if 'first_name' in user_metadata:
+        return user_metadata.get('first_name')
+    # Fallback: try parsing 'full_name' or 'name' from metadata (common OAuth fields)
+    for key in ('full_name', 'name'):
+        if key in user_metadata:
+            full_name = user_metadata.get(key, '')
+            if full_name and isinstance(full_name, str):
+                return full_name.split(' ')[0]
+            return None
+    return None
+
+def _ensure_local_user(supabase_user) -> Optional[User]:
+    """Make sure a Supabase-authenticated user has a local row, an IFSSystem and a Self part.
+    
+    Creates whatever is missing and records the user in `_bootstrapped_users` once
+    everything exists.
+    
+    Args:
+        supabase_user: Verified Supabase user (needs id, email and user_metadata).
+        
+    Returns:
+        Optional[User]: The local user, or None if it could not be found or created.
+    """
+    user_id_uuid = uuid.UUID(str(supabase_user.id))
+    
+    # Check if user exists in the database and create if not
+    user_exists_locally = False
+    user_created_now = False
+    bootstrapped = False
+
+    # One round trip for the user (by ID, else by email), their system and Self part
+    user, existing_system_id, has_self_part = _load_bootstrap_state(user_id_uuid, supabase_user.email)
+    if user is not None and user.id == user_id_uuid:
+        user_exists_locally = True
+    else:
+        # No row with this ID; a row matched by email means the user exists but with a different ID
+        email_user, user = user, None
+
+        if email_user:
+            # User exists with this email but different ID - update the ID
+            logger.info(f"Updating existing user ID to match Supabase: {supabase_user.email}")
+            try:
+                email_user.id = user_id_uuid
+                db.session.commit()
+                user_exists_locally = True # User now exists with correct ID
+                user = email_user # Use this user object going forward
+                logger.info(f"Updated user ID successfully to: {user.id}")
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Failed to update user ID: {str(e)}")
+                # Proceed cautiously, user might be in inconsistent state
+        else:
+            # No user with this ID or email - try to create new
+            logger.info(f"Creating new user record for Supabase user: {supabase_user.email}")
+
+            # Extract username from metadata or use email as fallback
+            # Keep username generation for the DB column requirement
+            username_base = supabase_user.user_metadata.get('username', supabase_user.email.split('@')[0])
+
+            # Check if username already exists and modify if needed
+            username = _unique_username(username_base)
+
+            extracted_first_name = _extract_first_name(supabase_user.user_metadata)
+
+            logger.info(f"Extracted first name: {extracted_first_name}")
+
+            # Create user with Supabase ID as the primary key. Supabase handles
+            # authentication, so store an unusable hash instead of bcrypt-hashing
+            # a random password on the request thread.
+            new_user = User(
+                username=username,
+                email=supabase_user.email,
+                password_hash=UNUSABLE_PASSWORD,
+                first_name=extracted_first_name # Pass extracted first name
+            )
+            # Set the id explicitly to match the Supabase Auth id
+            new_user.id = user_id_uuid
+
+            # Not committed yet: the user, system and Self part below go in one
+            # transaction, so a failure leaves nothing half-created
+            db.session.add(new_user)
+            user_exists_locally = True
+            user_created_now = True
+            user = new_user # Use the newly created user object
+            logger.info(f"Creating new user record with ID: {user.id} and username: {username}")
+
+    # --- Add System/Part Creation Logic --- 
+    # If a user record was just created OR successfully found/updated,
+    # check if they have an IFSSystem and create if not.
+    if user_exists_locally and user: 
+        system_created_now = False # Flag to track if system was created in this request
+        if existing_system_id is None:
+            logger.info(f"No IFSSystem found for user {user.id}. Creating system and default 'Self' part.")
+            try:
+                new_system = IFSSystem(user_id=user.id)
+                # Assign the ID up front so the Self part can reference it without a flush
+                new_system.id = uuid.uuid4()
+                db.session.add(new_system)
+                system = new_system # Use the newly created system object
+                system_created_now = True
+
+                # --- Create Self Part ONLY if System was just created --- 
+                self_part = Part.create_self(system.id)
+                db.session.add(self_part)
+                # --- End Create Self Part --- 
+
+                db.session.commit()
+                bootstrapped = True
+                logger.info(f"Successfully created {'user, ' if user_created_now else ''}IFSSystem ({system.id}) and Self part for user {user.id}")
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Failed to create IFSSystem or Self part for user {user.id}: {str(e)}")
+                system_created_now = False
+                if user_created_now:
+                    # The new user row was rolled back with them
+                    user = None
+        else:
+            logger.debug("User %s already has an IFSSystem (%s). Skipping system creation.", user.id, existing_system_id)
+
+        # --- Check/Create Self Part if System Existed but Part Might Be Missing --- 
+        if existing_system_id is not None and not system_created_now: # Only check if system existed before this request
+            if has_self_part:
+                bootstrapped = True
+            else:
+                logger.warning(f"IFSSystem {existing_system_id} exists for user {user.id}, but 'Self' part is missing. Creating Self part.")
+                try:
+                     # Create the missing Self part with DETAILED attributes
+                     new_self_part = Part.create_self(existing_system_id)
+                     db.session.add(new_self_part)
+                     db.session.commit()
+                     bootstrapped = True
+                     logger.info(f"Successfully created missing 'Self' part for system {existing_system_id}.")
+                except Exception as e:
+                     db.session.rollback()
+                     logger.error(f"Failed to create missing 'Self' part for system {existing_system_id}: {str(e)}")
+        # --- End Check/Create Self Part --- 
+
+    # --- End System/Part Creation Logic --- 
+
+    if bootstrapped:
+        _bootstrapped_users.set(user_id_uuid, True)
+
+    return user
+
+
 def auth_required(f):
     """
     Decorator for routes that require authentication.
@@ -143,10 +453,10 @@ def auth_required(f):
             
         if use_supabase_auth:
             # Use Supabase Auth strategy
-            if supabase.is_available():
+            if is_supabase_available():
                 try:
                     auth_header = request.headers.get('Authorization')
-                    logger.debug(f"Auth header: {auth_header}")
+                    logger.debug("Auth header: %s", auth_header)
                     if not auth_header or not auth_header.startswith('Bearer '):
                         return jsonify({"error": "Missing or invalid authorization header"}), 401
                     
@@ -155,168 +465,31 @@ def auth_required(f):
                     g.user_token = token
                     
                     # Verify with Supabase
-                    logger.debug(f"Verifying token with Supabase: {token[:10]}...")
-                    user_data = supabase.client.auth.get_user(token)
-                    if not user_data or not user_data.user:
+                    logger.debug("Verifying token with Supabase: %.10s...", token)
+                    supabase_user = _get_supabase_user(token)
+                    if supabase_user is None:
                         return jsonify({"error": "Invalid or expired token"}), 401
                     
-                    logger.debug(f"Authenticated user: {user_data.user.email}")
+                    logger.debug("Authenticated user: %s", supabase_user.email)
                     
                     # Store user data in g
                     g.current_user = {
-                        "id": user_data.user.id,
-                        "email": user_data.user.email,
+                        "id": supabase_user.id,
+                        "email": supabase_user.email,
                         # Add any other user data you need
                     }
                     
-                    # Check if user exists in the database and create if not
-                    from backend.app.models import db, User, IFSSystem, Part
+                    user_id_uuid = uuid.UUID(supabase_user.id)
                     
-                    user_exists_locally = False
-                    user_id_uuid = uuid.UUID(user_data.user.id)
+                    # Returning user: everything below is known to exist already
+                    if _bootstrapped_users.get(user_id_uuid):
+                        return f(*args, **kwargs)
                     
-                    # First check by ID
-                    user = User.query.filter_by(id=user_id_uuid).first()
+                    user = _ensure_local_user(supabase_user)
+
+                    # Pass along what handlers need from the row we already loaded
                     if user:
-                        user_exists_locally = True
-                    else:
-                        # Then check by email - maybe user exists but with different ID
-                        email_user = User.query.filter_by(email=user_data.user.email).first()
-                        
-                        if email_user:
-                            # User exists with this email but different ID - update the ID
-                            logger.info(f"Updating existing user ID to match Supabase: {user_data.user.email}")
-                            try:
-                                email_user.id = user_id_uuid
-                                db.session.commit()
-                                user_exists_locally = True # User now exists with correct ID
-                                user = email_user # Use this user object going forward
-                                logger.info(f"Updated user ID successfully to: {user.id}")
-                            except Exception as e:
-                                db.session.rollback()
-                                logger.error(f"Failed to update user ID: {str(e)}")
-                                # Proceed cautiously, user might be in inconsistent state
-                        else:
-                            # No user with this ID or email - try to create new
-                            logger.info(f"Creating new user record for Supabase user: {user_data.user.email}")
-                            
-                            # Extract username from metadata or use email as fallback
-                            # Keep username generation for the DB column requirement
-                            username_base = user_data.user.user_metadata.get('username', user_data.user.email.split('@')[0])
-                            
-                            # Check if username already exists and modify if needed
-                            username = username_base
-                            username_counter = 1
-                            while User.query.filter_by(username=username).first():
-                                username = f"{username_base}{username_counter}"
-                                username_counter += 1
-                                
-                            # Extract first name from metadata (attempt parsing)
-                            extracted_first_name = None
-                            # Prioritize 'first_name' if explicitly set in metadata (e.g., from our registration)
-                            if 'first_name' in user_data.user.user_metadata:
-                                extracted_first_name = user_data.user.user_metadata.get('first_name')
-                            # Fallback: try parsing 'full_name' or 'name' from metadata (common OAuth fields)
-                            elif 'full_name' in user_data.user.user_metadata:
-                                full_name = user_data.user.user_metadata.get('full_name', '')
-                                if full_name and isinstance(full_name, str):
-                                    extracted_first_name = full_name.split(' ')[0]
-                            elif 'name' in user_data.user.user_metadata:
-                                full_name = user_data.user.user_metadata.get('name', '')
-                                if full_name and isinstance(full_name, str):
-                                    extracted_first_name = full_name.split(' ')[0]
-                            
-                            logger.info(f"Extracted first name: {extracted_first_name}")
-                                
-                            # Create a new user with a random password (won't be used for auth since we're using Supabase)
-                            import secrets
-                            import string
-                            random_password = ''.join(secrets.choice(string.ascii_letters + string.digits) for _ in range(16))
-                            
-                            # Create user with Supabase ID as the primary key
-                            new_user = User(
-                                username=username,
-                                email=user_data.user.email,
-                                password=random_password,
-                                first_name=extracted_first_name # Pass extracted first name
-                            )
-                            # Set the id explicitly to match the Supabase Auth id
-                            new_user.id = user_id_uuid
-                            
-                            try:
-                                db.session.add(new_user)
-                                # Commit here to ensure user exists before adding system/part
-                                db.session.commit() 
-                                user_exists_locally = True
-                                user = new_user # Use the newly created user object
-                                logger.info(f"Created new user record with ID: {user.id} and username: {username}")
-                            except Exception as e:
-                                db.session.rollback()
-                                logger.error(f"Failed to create user record: {str(e)}")
-                                # If user creation failed, we cannot proceed to create system/part
-                                # Maybe return an error? For now, log and continue.
-                    
-                    # --- Add System/Part Creation Logic --- 
-                    # If a user record was just created OR successfully found/updated,
-                    # check if they have an IFSSystem and create if not.
-                    if user_exists_locally and user: 
-                        system = IFSSystem.query.filter_by(user_id=user.id).first()
-                        system_created_now = False # Flag to track if system was created in this request
-                        if not system:
-                            logger.info(f"No IFSSystem found for user {user.id}. Creating system and default 'Self' part.")
-                            try:
-                                new_system = IFSSystem(user_id=user.id)
-                                db.session.add(new_system)
-                                db.session.flush() # Get the new_system ID
-                                system = new_system # Use the newly created system object
-                                system_created_now = True
-                                
-                                # --- Create Self Part ONLY if System was just created --- 
-                                self_part = Part(
-                                    name="Self", 
-                                    system_id=str(system.id),
-                                    role="Self", 
-                                    description="The centered, compassionate Self that is the goal of IFS therapy.", 
-                                    feelings=["Calm", "curious", "compassionate", "connected", "clear", "confident", "creative", "courageous"],
-                                    beliefs=["All parts are welcome. I can hold space for all experiences."]
-                                )
-                                db.session.add(self_part)
-                                # --- End Create Self Part --- 
-                                
-                                db.session.commit()
-                                logger.info(f"Successfully created IFSSystem ({system.id}) and Self part for user {user.id}")
-                            except Exception as e:
-                                db.session.rollback()
-                                logger.error(f"Failed to create IFSSystem or Self part for user {user.id}: {str(e)}")
-                                system = None # Ensure system is None if creation failed
-                                system_created_now = False
-                        else:
-                            logger.debug(f"User {user.id} already has an IFSSystem ({system.id}). Skipping system creation.")
-                        
-                        # --- Check/Create Self Part if System Existed but Part Might Be Missing --- 
-                        if system and not system_created_now: # Only check if system existed before this request
-                            self_part_exists = Part.query.filter_by(system_id=str(system.id), role='Self').first()
-                            if not self_part_exists:
-                                logger.warning(f"IFSSystem {system.id} exists for user {user.id}, but 'Self' part is missing. Creating Self part.")
-                                try:
-                                     # Create the missing Self part with DETAILED attributes
-                                     new_self_part = Part(
-                                         name="Self", 
-                                         system_id=str(system.id),
-                                         role="Self", 
-                                         description="The centered, compassionate Self that is the goal of IFS therapy.",
-                                         feelings=["Calm", "curious", "compassionate", "connected", "clear", "confident", "creative", "courageous"],
-                                         beliefs=["All parts are welcome. I can hold space for all experiences."]
-                                     )
-                                     db.session.add(new_self_part)
-                                     db.session.commit()
-                                     logger.info(f"Successfully created missing 'Self' part for system {system.id}.")
-                                except Exception as e:
-                                     db.session.rollback()
-                                     logger.error(f"Failed to create missing 'Self' part for system {system.id}: {str(e)}")
-                        # --- End Check/Create Self Part --- 
-                                     
-                    # --- End System/Part Creation Logic --- 
+                        g.current_user["subscription_tier"] = user.subscription_tier
 
                     return f(*args, **kwargs)
                 except Exception as e:
@@ -359,7 +532,7 @@ def register_user(firstName: Optional[str], email: str, password: str) -> Tuple[
         Tuple[Dict[str, Any], str, Optional[str]]: User data, access token, and refresh token (or None)
     """
     # Check if we should use Supabase or JWT
-    actually_use_supabase = use_supabase_auth and supabase.is_available()
+    actually_use_supabase = is_supabase_available()
     
     if actually_use_supabase:
         try:
@@ -377,7 +550,9 @@ def register_user(firstName: Optional[str], email: str, password: str) -> Tuple[
                 "options": signup_options
             })
             
-            logger.debug(f"Supabase signup response: {signup_data}")
+            # Never log the response itself: it carries the session's access and refresh tokens
+            logger.debug("Supabase signup response: user_id=%s has_session=%s",
+                         signup_data.user.id if signup_data.user else None, bool(signup_data.session))
             
             if not signup_data.user:
                 raise ValueError("User registration failed")
@@ -396,6 +571,16 @@ def register_user(firstName: Optional[str], email: str, password: str) -> Tuple[
                 access_token = signup_data.session.access_token
                 refresh_token = signup_data.session.refresh_token # Get refresh token
                 logger.debug("Session and tokens available after registration")
+                
+                # Create the local user, system and Self part at signup so the first
+                # authenticated request only has to confirm they exist. Only with a session:
+                # without one the signup may be unconfirmed (or an obfuscated repeat signup
+                # whose user ID isn't real), and auth_required bootstraps on first login instead.
+                try:
+                    _ensure_local_user(signup_data.user)
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Could not create local records for new user {email}: {str(e)}")
             else:
                 logger.warning("No session available after registration - email confirmation may be required")
                 user_data["confirmation_required"] = True
@@ -406,21 +591,14 @@ def register_user(firstName: Optional[str], email: str, password: str) -> Tuple[
             raise
     else:
         # Use regular database models and JWT
-        from backend.app.models import db, User
-        from flask_jwt_extended import create_access_token
-        
         # Check for existing email only
-        existing_email = User.query.filter_by(email=email).first()
-        if existing_email:
+        email_taken = db.session.query(User.query.filter(func.lower(User.email) == email.lower()).exists()).scalar()
+        if email_taken:
             raise ValueError("Email already exists")
         
         # Generate a unique username from email prefix
         username_base = email.split('@')[0]
-        username = username_base
-        username_counter = 1
-        while User.query.filter_by(username=username).first():
-            username = f"{username_base}{username_counter}"
-            username_counter += 1
+        username = _unique_username(username_base)
             
         logger.info(f"Generated unique username '{username}' for email {email}")
             
@@ -451,10 +629,10 @@ def login_user(username: str, password: str) -> Tuple[Dict[str, Any], str, Optio
     Returns:
         Tuple[Dict[str, Any], str, Optional[str]]: User data, access token, and refresh token (or None)
     """
-    logger.debug(f"Login attempt for user: {username}, auth mode: {'Supabase' if use_supabase_auth else 'JWT'}")
+    logger.debug("Login attempt for user: %s, auth mode: %s", username, 'Supabase' if use_supabase_auth else 'JWT')
     
     # Check if we should use Supabase or JWT
-    actually_use_supabase = use_supabase_auth and supabase.is_available()
+    actually_use_supabase = is_supabase_available()
     logger.info(f"Using {'Supabase' if actually_use_supabase else 'JWT'} authentication for login")
     
     if actually_use_supabase:
@@ -465,13 +643,15 @@ def login_user(username: str, password: str) -> Tuple[Dict[str, Any], str, Optio
             # If username doesn't look like an email, try to find the matching email
             if '@' not in username:
                 try:
-                    # Try to look up the user by username in the users table
-                    logger.debug(f"Looking up email for username: {username}")
-                    response = supabase.get_table('users').select('email').eq('username', username).execute()
-                    logger.debug(f"Database lookup response: {response.data}")
+                    # Look up the user by username in the local users table (unique index)
+                    # rather than through a Supabase REST round trip
+                    logger.debug("Looking up email for username: %s", username)
+                    found_email = db.session.execute(
+                        db.select(User.email).where(User.username == username)
+                    ).scalar()
                     
-                    if response.data and len(response.data) > 0:
-                        user_email = response.data[0]['email']
+                    if found_email:
+                        user_email = found_email
                         logger.info(f"Found email {user_email} for username {username}")
                     else:
                         logger.warning(f"No email found for username {username}")
@@ -487,7 +667,9 @@ def login_user(username: str, password: str) -> Tuple[Dict[str, Any], str, Optio
                 "password": password
             })
             
-            logger.debug(f"Login response: {login_data}")
+            # IDs and flags only; the session holds the access and refresh tokens
+            logger.debug("Login response: user_id=%s has_session=%s",
+                         login_data.user.id if login_data.user else None, bool(login_data.session))
             
             # Check for user and session
             if not login_data.user or not login_data.session:
@@ -499,8 +681,7 @@ def login_user(username: str, password: str) -> Tuple[Dict[str, Any], str, Optio
             # Fetch the full user profile from the local database using the Supabase user ID
             local_user = None
             try:
-                from backend.app.models import User # Ensure User model is imported
-                local_user = User.query.get(login_data.user.id)
+                local_user = get_user_by_id(login_data.user.id)
                 if local_user:
                     user_data = local_user.to_dict() # Use the full profile from DB
                     logger.info(f"Fetched local profile for Supabase user {login_data.user.id}")
@@ -2,6 +2,9 @@
 Database adapter module.
 Provides a unified interface for database operations with both
 SQLAlchemy and Supabase backends.
+
+To resolve several records by ID, use `get_many` (one query / request) rather
+than calling `get_by_id` in a loop.
 """
 import os
 import logging
@@ -9,8 +12,11 @@ import json
 import ast
 from typing import Dict, List, Any, Optional, Union, Tuple
 from uuid import UUID
+from datetime import datetime, timezone
 
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect as sql_inspect, update as sql_update
+from sqlalchemy.dialects.postgresql import JSONB
 from backend.app.utils.supabase_client import supabase
 
 logger = logging.getLogger(__name__)
@@ -30,6 +36,8 @@ class DBAdapter:
         self.db = sqlalchemy_db
         self.session = sqlalchemy_db.session if sqlalchemy_db else None
         self.using_supabase = use_supabase_db
+        # Created on first Supabase REST call, see `_http`
+        self._http_session = None
         
         # Log the Supabase usage status on initialization
         logger.info(f"DBAdapter initialized. Using Supabase: {self.using_supabase}")
@@ -38,6 +46,18 @@ class DBAdapter:
             logger.error("Supabase client not available but SUPABASE_USE_FOR_DB is True")
             raise ValueError("Supabase client not available")
     
+    @property
+    def _http(self):
+        """Shared HTTP session for Supabase REST calls.
+        
+        Reusing one session keeps connections to Supabase alive between calls instead
+        of opening a new TCP/TLS connection for every query.
+        """
+        if self._http_session is None:
+            import requests
+            self._http_session = requests.Session()
+        return self._http_session
+    
     def _model_to_dict(self, model) -> Dict[str, Any]:
         """Convert SQLAlchemy model to dictionary.
         
@@ -59,6 +79,71 @@ class DBAdapter:
             result[column.name] = value
         return result
     
+    def _row_to_dict(self, row) -> Dict[str, Any]:
+        """Convert a column-projected result row to a JSON-friendly dictionary.
+        
+        Args:
+            row: SQLAlchemy Row returned by a column query
+            
+        Returns:
+            Dictionary keyed by column name
+        """
+        result = {}
+        for key, value in row._asdict().items():
+            if isinstance(value, UUID):
+                value = str(value)
+            elif hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            result[key] = value
+        return result
+    
+    @staticmethod
+    def _as_uuid(id_value: Union[str, UUID]) -> UUID:
+        """Coerce an ID to the UUID the identity map is keyed by.
+        
+        Args:
+            id_value: ID as a string or UUID
+            
+        Returns:
+            The ID as a UUID; raises ValueError if it isn't one
+        """
+        return id_value if isinstance(id_value, UUID) else UUID(str(id_value))
+    
+    @staticmethod
+    def _normalize_list_fields(record: Dict[str, Any]) -> Dict[str, Any]:
+        """Coerce a Supabase record's list fields (feelings, beliefs, ...) to lists in place.
+        
+        Args:
+            record: Record returned by the Supabase REST API
+            
+        Returns:
+            The same record, for chaining
+        """
+        for field in ('feelings', 'beliefs', 'triggers', 'needs'):
+            if field in record and isinstance(record[field], str):
+                try:
+                    # Attempt to parse the string as a Python literal (handles lists)
+                    parsed_value = ast.literal_eval(record[field])
+                    if isinstance(parsed_value, list):
+                        record[field] = parsed_value
+                    else:
+                        # If not a list after parsing, keep original or set default
+                        logger.warning(f"Parsed '{field}' for record {record.get('id')} but result was not a list: {parsed_value}. Keeping original string.")
+                except (ValueError, SyntaxError, TypeError) as parse_error:
+                    # Handle cases where the string is not a valid list literal
+                    logger.warning(f"Could not parse string field '{field}' for record {record.get('id')}: {record[field]}. Error: {parse_error}. Setting to empty list.")
+                    record[field] = []
+            elif field in record and record[field] is None:
+                # Ensure None values become empty lists for consistency on frontend
+                record[field] = []
+        return record
+    
+    @staticmethod
+    def _is_jsonb_column(model_class, key: str) -> bool:
+        """Check whether `key` is a JSONB column on the model's table."""
+        column = model_class.__table__.columns.get(key)
+        return column is not None and isinstance(column.type, JSONB)
+    
     def _get_auth_headers(self) -> Dict[str, str]:
         """Get authentication headers for Supabase requests.
         
@@ -88,8 +173,6 @@ class DBAdapter:
                 headers = self._get_auth_headers()
                 
                 # Make a direct HTTP request to the Supabase REST API
-                import requests
-                
                 # Get the Supabase URL and key from the client
                 supabase_url = supabase.client.rest_url
                 api_key = supabase.client.supabase_key
@@ -108,38 +191,21 @@ class DBAdapter:
                     request_headers['Authorization'] = headers['Authorization']
                 
                 # Make the GET request
-                response = requests.get(url, headers=request_headers)
+                response = self._http.get(url, headers=request_headers)
                 
                 if response.status_code >= 200 and response.status_code < 300:
                     # Success
                     response_data = response.json()
                     if response_data and len(response_data) > 0:
-                        record = response_data[0]
-                        
                         # Post-process list-like fields that might be strings
-                        list_fields = ['feelings', 'beliefs', 'triggers', 'needs']
-                        for field in list_fields:
-                            if field in record and isinstance(record[field], str):
-                                try:
-                                    parsed_value = ast.literal_eval(record[field])
-                                    if isinstance(parsed_value, list):
-                                        record[field] = parsed_value
-                                    else:
-                                        logger.warning(f"Parsed '{field}' for record {record.get('id')} but result was not a list: {parsed_value}. Keeping original string.")
-                                except (ValueError, SyntaxError, TypeError) as parse_error:
-                                    logger.warning(f"Could not parse string field '{field}' for record {record.get('id')}: {record[field]}. Error: {parse_error}. Setting to empty list.")
-                                    record[field] = []
-                            elif field in record and record[field] is None:
-                                record[field] = []
-                                
-                        return record # Return the processed record
+                        return self._normalize_list_fields(response_data[0]) # Return the processed record
                     return None
                 
                 # Log error details
                 logger.error(f"Supabase REST API error: {response.status_code} - {response.text}")
                 return None
             else:
-                record = model_class.query.get(id_value)
+                record = self.db.session.get(model_class, self._as_uuid(id_value))
                 if record:
                     return self._model_to_dict(record)
                 return None
@@ -147,9 +213,67 @@ class DBAdapter:
             logger.error(f"Error getting record by ID from {table}: {e}")
             return None
     
+    def get_many(self, table: str, model_class, id_values: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get several records by ID in a single query.
+        
+        Args:
+            table: Table name (Supabase backend)
+            model_class: SQLAlchemy model class (SQLAlchemy backend)
+            id_values: IDs to fetch; duplicates are ignored
+            
+        Returns:
+            Dictionary mapping each found ID (as a string) to its record; missing IDs are absent
+        """
+        ids = list(dict.fromkeys(str(id_value) for id_value in id_values))
+        if not ids:
+            return {}
+        try:
+            if self.using_supabase:
+                # Get authentication headers
+                headers = self._get_auth_headers()
+                
+                # Make a direct HTTP request to the Supabase REST API
+                # Get the Supabase URL and key from the client
+                supabase_url = supabase.client.rest_url
+                api_key = supabase.client.supabase_key
+                
+                # One request for all IDs (PostgREST `in` filter)
+                url = f"{supabase_url}/{table}"
+                params = {'id': f"in.({','.join(ids)})"}
+                
+                # Combine our auth headers with the required Supabase headers
+                request_headers = {
+                    'apikey': api_key,
+                    'Content-Type': 'application/json',
+                    'Accept': 'application/json'
+                }
+                # Add the Authorization header if we have it
+                if headers and 'Authorization' in headers:
+                    request_headers['Authorization'] = headers['Authorization']
+                
+                # Make the GET request
+                response = self._http.get(url, headers=request_headers, params=params)
+                
+                if response.status_code >= 200 and response.status_code < 300:
+                    return {
+                        str(record['id']): self._normalize_list_fields(record)
+                        for record in response.json()
+                    }
+                
+                # Log error details
+                logger.error(f"Supabase REST API error: {response.status_code} - {response.text}")
+                return {}
+            else:
+                records = model_class.query.filter(model_class.id.in_([self._as_uuid(i) for i in ids])).all()
+                return {str(record.id): self._model_to_dict(record) for record in records}
+        except Exception as e:
+            logger.error(f"Error getting records by ID from {table}: {e}")
+            return {}
+    
     def get_all(self, table: str, model_class, filter_dict: Optional[Dict[str, Any]] = None, 
-                order_by: Optional[Tuple[str, str]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Get all records, optionally filtered, ordered, and limited."""
+                order_by: Optional[Tuple[str, str]] = None, limit: Optional[int] = None,
+                columns: Optional[Tuple[str, ...]] = None) -> List[Dict[str, Any]]:
+        """Get all records, optionally filtered, ordered, limited, and narrowed to `columns`."""
         try:
             # Log Supabase usage status within the method
             logger.debug(f"DBAdapter.get_all called for table '{table}'. Using Supabase: {self.using_supabase}")
@@ -158,8 +282,6 @@ class DBAdapter:
                 headers = self._get_auth_headers()
                 
                 # Make a direct HTTP request to the Supabase REST API
-                import requests
-                
                 # Get the Supabase URL and key from the client
                 supabase_url = supabase.client.rest_url
                 api_key = supabase.client.supabase_key
@@ -181,6 +303,10 @@ class DBAdapter:
                 # Apply limit if provided
                 if limit:
                     params['limit'] = str(limit)
+                
+                # Apply column projection if provided
+                if columns:
+                    params['select'] = ','.join(columns)
                     
                 # Combine our auth headers with the required Supabase headers
                 request_headers = {
@@ -193,42 +319,23 @@ class DBAdapter:
                     request_headers['Authorization'] = headers['Authorization']
                 
                 # Make the GET request
-                response = requests.get(url, headers=request_headers, params=params)
+                response = self._http.get(url, headers=request_headers, params=params)
                 
                 if response.status_code >= 200 and response.status_code < 300:
                     # Success
                     response_data = response.json()
                     
                     # Post-process list-like fields that might be strings
-                    list_fields = ['feelings', 'beliefs', 'triggers', 'needs']
-                    processed_data = []
-                    for record in response_data:
-                        for field in list_fields:
-                            if field in record and isinstance(record[field], str):
-                                try:
-                                    # Attempt to parse the string as a Python literal (handles lists)
-                                    parsed_value = ast.literal_eval(record[field])
-                                    if isinstance(parsed_value, list):
-                                        record[field] = parsed_value
-                                    else:
-                                        # If not a list after parsing, keep original or set default
-                                        logger.warning(f"Parsed '{field}' for record {record.get('id')} but result was not a list: {parsed_value}. Keeping original string.")
-                                except (ValueError, SyntaxError, TypeError) as parse_error:
-                                    # Handle cases where the string is not a valid list literal
-                                    logger.warning(f"Could not parse string field '{field}' for record {record.get('id')}: {record[field]}. Error: {parse_error}. Setting to empty list.")
-                                    record[field] = []
-                            elif field in record and record[field] is None:
-                                # Ensure None values become empty lists for consistency on frontend
-                                record[field] = []
-                        processed_data.append(record)
-                        
-                    return processed_data # Return the processed data
+                    return [self._normalize_list_fields(record) for record in response_data]
                 
                 # Log error details
                 logger.error(f"Supabase REST API error: {response.status_code} - {response.text}")
                 return []
             else:
-                query = model_class.query
+                if columns:
+                    query = self.db.session.query(*[getattr(model_class, column) for column in columns])
+                else:
+                    query = model_class.query
                 
                 # Apply filters
                 if filter_dict:
@@ -249,11 +356,83 @@ class DBAdapter:
                     query = query.limit(limit)
                     
                 records = query.all()
+                if columns:
+                    return [self._row_to_dict(record) for record in records]
                 return [self._model_to_dict(record) for record in records]
         except Exception as e:
             logger.error(f"Error getting records from {table}: {e}")
             return []
     
+    def get_version(self, table: str, model_class, filter_dict: Optional[Dict[str, Any]] = None,
+                    column: str = 'updated_at') -> Optional[str]:
+        """Get a cheap version marker for a set of records without loading them.
+        
+        The marker combines the row count with the latest value of ``column``, so it
+        changes whenever a matching record is created, updated or deleted.
+        
+        Args:
+            table: Table name (for Supabase)
+            model_class: SQLAlchemy model class (for SQLAlchemy)
+            filter_dict: Optional equality filters
+            column: Timestamp column to take the maximum of
+            
+        Returns:
+            Version string, or None if it could not be determined
+        """
+        try:
+            if self.using_supabase:
+                # Get authentication headers
+                headers = self._get_auth_headers()
+                
+                # Make a direct HTTP request to the Supabase REST API
+                # Get the Supabase URL and key from the client
+                supabase_url = supabase.client.rest_url
+                api_key = supabase.client.supabase_key
+                
+                # Fetch only the newest timestamp; the total count comes back in content-range
+                url = f"{supabase_url}/{table}"
+                params = {
+                    'select': column,
+                    'order': f"{column}.desc.nullslast",
+                    'limit': '1'
+                }
+                if filter_dict:
+                    for key, value in filter_dict.items():
+                        params[key] = f"eq.{value}"
+                
+                request_headers = {
+                    'apikey': api_key,
+                    'Accept': 'application/json',
+                    'Prefer': 'count=exact'
+                }
+                if headers and 'Authorization' in headers:
+                    request_headers['Authorization'] = headers['Authorization']
+                
+                response = self._http.get(url, headers=request_headers, params=params)
+                
+                if response.status_code >= 200 and response.status_code < 300:
+                    content_range = response.headers.get('content-range', '')
+                    response_data = response.json()
+                    latest = response_data[0].get(column) if response_data else None
+                    return f"{content_range.split('/')[-1]}-{latest or ''}"
+                
+                logger.error(f"Supabase REST API version error: {response.status_code} - {response.text}")
+                return None
+            else:
+                col_attr = getattr(model_class, column)
+                query = self.db.session.query(self.db.func.count(), self.db.func.max(col_attr))
+                
+                # Apply filters
+                if filter_dict:
+                    for key, value in filter_dict.items():
+                        query = query.filter(getattr(model_class, key) == value)
+                
+                count, latest = query.one()
+                return f"{count}-{latest.isoformat() if latest else ''}"
+        except Exception as e:
+            logger.error(f"Error getting version for {table}: {e}")
+            return None
+    
     def create(self, table: str, model_class, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Create a new record.
         
@@ -272,9 +451,10 @@ class DBAdapter:
                 for key, value in data.items():
                     if isinstance(value, UUID):
                         processed_data[key] = str(value)
-                    elif isinstance(value, list):
+                    elif isinstance(value, list) and not self._is_jsonb_column(model_class, key):
                         # Convert list (likely embedding vector) to string representation
-                        # Supabase might expect vectors as strings like '[1,2,3]'
+                        # Supabase might expect vectors as strings like '[1,2,3]'.
+                        # JSONB columns keep the list so it's stored as a JSON array.
                         processed_data[key] = str(value)
                     else:
                         processed_data[key] = value
@@ -283,8 +463,6 @@ class DBAdapter:
                 headers = self._get_auth_headers()
                 
                 # Make a direct HTTP request to the Supabase REST API instead
-                import requests
-                
                 # Get the Supabase URL and key from the client
                 supabase_url = supabase.client.rest_url
                 api_key = supabase.client.supabase_key
@@ -304,7 +482,7 @@ class DBAdapter:
                 
                 # Make the POST request
                 logger.debug(f"Supabase Create Payload for {table}: {json.dumps(processed_data)[:200]}...") # Log payload
-                response = requests.post(url, json=processed_data, headers=request_headers)
+                response = self._http.post(url, json=processed_data, headers=request_headers)
                 
                 if response.status_code >= 200 and response.status_code < 300:
                     # Success
@@ -336,15 +514,22 @@ class DBAdapter:
             return None
     
     def update(self, table: str, model_class, id_value: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Update a record."""
+        """Update a record.
+        
+        Models with an `updated_at` column get it bumped automatically unless
+        `data` sets it explicitly.
+        """
         try:
+            touch_updated_at = 'updated_at' not in data and hasattr(model_class, 'updated_at')
             if self.using_supabase:
+                # PostgREST can't express NOW(), so stamp the update here
+                if touch_updated_at:
+                    data = dict(data, updated_at=datetime.now(timezone.utc).isoformat())
+                
                 # Get authentication headers
                 headers = self._get_auth_headers()
                 
                 # Make a direct HTTP request to the Supabase REST API
-                import requests
-                
                 # Get the Supabase URL and key from the client
                 supabase_url = supabase.client.rest_url
                 api_key = supabase.client.supabase_key
@@ -364,7 +549,7 @@ class DBAdapter:
                     request_headers['Authorization'] = headers['Authorization']
                 
                 # Make the PATCH request
-                response = requests.patch(url, json=data, headers=request_headers)
+                response = self._http.patch(url, json=data, headers=request_headers)
                 
                 if response.status_code >= 200 and response.status_code < 300:
                     # Success
@@ -377,15 +562,37 @@ class DBAdapter:
                 logger.error(f"Supabase REST API error: {response.status_code} - {response.text}")
                 return None
             else:
-                record = model_class.query.get(id_value)
-                if not record:
+                # Only mapped columns can go in the UPDATE; other keys (e.g. a part's
+                # image_url) were silently ignored by the old setattr loop, so drop them
+                column_keys = sql_inspect(model_class).column_attrs.keys()
+                values = {key: value for key, value in data.items() if key in column_keys}
+                # Let Postgres set the timestamp (NOW()) as part of the UPDATE
+                if touch_updated_at:
+                    values['updated_at'] = self.db.func.now()
+                
+                # Bind the id as the UUID the identity map holds
+                record_id = self._as_uuid(id_value)
+                if values:
+                    # One UPDATE ... RETURNING instead of a SELECT, the UPDATE and a reload
+                    # after commit. populate_existing refreshes an instance a caller already
+                    # loaded (e.g. via get_by_id) from the returned row instead of keeping
+                    # its pre-update attributes.
+                    record = self.db.session.execute(
+                        sql_update(model_class)
+                        .where(model_class.id == record_id)
+                        .values(**values)
+                        .returning(model_class)
+                        .execution_options(populate_existing=True)
+                    ).scalar_one_or_none()
+                else:
+                    record = self.db.session.get(model_class, record_id)
+                if record is None:
                     return None
                 
-                for key, value in data.items():
-                    setattr(record, key, value)
-                
+                # Serialize before commit expires the freshly returned attributes
+                result = self._model_to_dict(record)
                 self.db.session.commit()
-                return self._model_to_dict(record)
+                return result
         except Exception as e:
             logger.error(f"Error updating record in {table}: {e}")
             if not self.using_supabase:
@@ -400,8 +607,6 @@ class DBAdapter:
                 headers = self._get_auth_headers()
                 
                 # Make a direct HTTP request to the Supabase REST API
-                import requests
-                
                 # Get the Supabase URL and key from the client
                 supabase_url = supabase.client.rest_url
                 api_key = supabase.client.supabase_key
@@ -419,11 +624,11 @@ class DBAdapter:
                     request_headers['Authorization'] = headers['Authorization']
                 
                 # Make the DELETE request
-                response = requests.delete(url, headers=request_headers)
+                response = self._http.delete(url, headers=request_headers)
                 
                 return response.status_code >= 200 and response.status_code < 300
             else:
-                record = model_class.query.get(id_value)
+                record = self.db.session.get(model_class, self._as_uuid(id_value))
                 if not record:
                     return False
                 
@@ -445,8 +650,6 @@ class DBAdapter:
                 headers = self._get_auth_headers()
                 
                 # Make a direct HTTP request to the Supabase RPC endpoint
-                import requests
-                
                 # Get the Supabase URL and key from the client
                 supabase_url = supabase.client.rest_url
                 api_key = supabase.client.supabase_key
@@ -473,7 +676,7 @@ class DBAdapter:
                     request_headers['Authorization'] = headers['Authorization']
                 
                 # Make the RPC POST request
-                response = requests.post(url, json=rpc_params, headers=request_headers)
+                response = self._http.post(url, json=rpc_params, headers=request_headers)
                 
                 if response.status_code >= 200 and response.status_code < 300:
                     # Success
@@ -512,8 +715,6 @@ class DBAdapter:
                 headers = self._get_auth_headers()
                 
                 # Make a direct HTTP request to the Supabase REST API
-                import requests
-                
                 # Get the Supabase URL and key from the client
                 supabase_url = supabase.client.rest_url
                 api_key = supabase.client.supabase_key
@@ -539,7 +740,7 @@ class DBAdapter:
                     request_headers['Authorization'] = headers['Authorization']
                 
                 # Make a HEAD request to get the count
-                response = requests.head(url, headers=request_headers, params=params)
+                response = self._http.head(url, headers=request_headers, params=params)
                 
                 if response.status_code >= 200 and response.status_code < 300:
                     # Get count from headers
@@ -554,7 +755,7 @@ class DBAdapter:
                             return 0
                     
                     # Fallback to getting all records and counting them
-                    response = requests.get(url, headers=request_headers, params=params)
+                    response = self._http.get(url, headers=request_headers, params=params)
                     if response.status_code >= 200 and response.status_code < 300:
                         return len(response.json())
                 
@@ -0,0 +1,60 @@
+"""
+orjson-backed JSON provider for Flask.
+Encodes jsonify responses in C and hands the bytes straight to the response,
+keeping the output compatible with Flask's default provider.
+"""
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that serializes with orjson.
+
+    UUIDs and dataclasses are encoded natively. Datetimes are passed through to
+    Flask's default handler so they keep the same HTTP-date format as before, and
+    anything else orjson doesn't know (e.g. Decimal) falls back to it too.
+    """
+
+    def _options(self, indent: bool = False) -> int:
+        """Build the orjson option flags for this provider's settings."""
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs) -> str:
+        """Serialize data as a JSON string.
+
+        Args:
+            obj: The data to serialize.
+            **kwargs: `indent` is honored; other json.dumps arguments are ignored.
+
+        Returns:
+            str: The encoded JSON.
+        """
+        return orjson.dumps(obj, default=self.default, option=self._options(bool(kwargs.get("indent")))).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        """Deserialize JSON from a string or bytes.
+
+        Args:
+            s: Text or UTF-8 bytes to decode.
+            **kwargs: Ignored, accepted for API compatibility.
+
+        Returns:
+            The decoded data.
+        """
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Serialize the given arguments as a JSON response without a str round trip.
+
+        Returns:
+            Response: Response with the `application/json` mimetype.
+        """
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent)) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,37 @@
+"""
+Pre-encoded JSON error responses.
+Static error payloads are encoded once at import time instead of going through
+jsonify on every request.
+"""
+import json
+
+from flask import current_app
+
+
+def encode_error(message: str) -> bytes:
+    """Encode a static `{"error": message}` body.
+
+    Args:
+        message: Error message to embed.
+
+    Returns:
+        bytes: UTF-8 JSON body, newline-terminated like jsonify output.
+    """
+    return (json.dumps({"error": message}) + "\n").encode("utf-8")
+
+
+def error_response(body: bytes, status: int):
+    """Build a JSON response around a pre-encoded error body.
+
+    Args:
+        body: Body produced by `encode_error`.
+        status: HTTP status code.
+
+    Returns:
+        Response: Fresh response object for the current app.
+    """
+    return current_app.response_class(body, status=status, mimetype="application/json")
+
+
+SYSTEM_NOT_FOUND = encode_error("System not found")
+RELATIONSHIP_NOT_FOUND = encode_error("Relationship not found")
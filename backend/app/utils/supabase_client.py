@@ -64,16 +64,8 @@ class SupabaseManager:
 
             self._client = create_client(supabase_url, supabase_key)
             logging.info("Supabase client initialized successfully")
-            
-            # Test the connection by making a simple API call
-            try:
-                # Try simple query to test connection
-                user_count = self._client.table('users').select('count', count='exact').execute()
-                logging.info(f"Supabase connection test successful. User count: {user_count.count if hasattr(user_count, 'count') else 'unknown'}")
-            except Exception as test_error:
-                logging.error(f"Supabase connection test failed: {str(test_error)}")
-                # Don't set client to None - this would break the fallback mechanism
-                # Let auth_adapter handle the fallback
+            # No connectivity test here: this runs at import time in every worker.
+            # auth_adapter.is_supabase_available() probes lazily when asked.
                 
         except Exception as e:
             logging.error(f"Failed to initialize Supabase client: {str(e)}")
@@ -0,0 +1,51 @@
+"""
+Lookup helpers for a user's IFS system.
+Most endpoints only need the ID of the caller's system, so it is cached on `g`
+for the request and in a process-wide TTL cache across requests.
+"""
+import logging
+from typing import Any, Optional
+
+from flask import g
+
+from backend.app.models import db, IFSSystem
+from backend.app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# user_id -> system_id (as string). Systems are never reassigned to another user and
+# no endpoint deletes one, so entries only go stale if a system is removed out of band;
+# the TTL bounds that. Misses (no system yet) are never cached.
+_system_id_cache = TTLCache(maxsize=10_000, ttl=300)
+
+def get_system_id_for_user(user_id: Any) -> Optional[str]:
+    """Get the ID of the user's IFS system.
+    
+    Args:
+        user_id: ID of the user (string or UUID).
+        
+    Returns:
+        Optional[str]: The system ID as a string, or None if the user has no system.
+    """
+    key = str(user_id)
+    request_cache = g.setdefault('_system_ids', {})
+    if key in request_cache:
+        return request_cache[key]
+    
+    system_id = _system_id_cache.get(key)
+    if system_id is None:
+        result = db.session.execute(
+            db.select(IFSSystem.id).where(IFSSystem.user_id == user_id).limit(1)
+        ).scalar()
+        system_id = str(result) if result else None
+        if system_id:
+            _system_id_cache.set(key, system_id)
+    
+    request_cache[key] = system_id
+    return system_id
+
+def remember_system_id(user_id: Any, system_id: Any) -> None:
+    """Record a user's system ID, e.g. right after the system was created."""
+    key = str(user_id)
+    _system_id_cache.set(key, str(system_id))
+    g.setdefault('_system_ids', {})[key] = str(system_id)
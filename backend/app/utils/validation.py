@@ -0,0 +1,33 @@
+"""
+Request validation helpers.
+Cheap pre-checks that run before the full Marshmallow schemas so obviously
+malformed payloads are rejected without a schema walk.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def check_required_strings(data: Any, required: Sequence[str]) -> Optional[Dict[str, List[str]]]:
+    """Check that `data` is a dict holding a string for each required key.
+    
+    Error messages match Marshmallow's, so responses look the same whichever
+    check rejects the payload.
+    
+    Args:
+        data: Parsed JSON request body.
+        required: Keys that must be present with a string value.
+        
+    Returns:
+        Optional[Dict[str, List[str]]]: Marshmallow-style error details, or None if the checks pass.
+    """
+    if not isinstance(data, dict):
+        return {"_schema": ["Invalid input type."]}
+    
+    errors = {}
+    for key in required:
+        if key not in data:
+            errors[key] = ["Missing data for required field."]
+        elif data[key] is None:
+            errors[key] = ["Field may not be null."]
+        elif not isinstance(data[key], str):
+            errors[key] = ["Not a valid string."]
+    return errors or None
@@ -23,7 +23,7 @@ print(f"DATABASE_URL: {'Set (redacted)' if os.environ.get('DATABASE_URL') else '
 try:
     # Use backend package pattern for imports
     import backend.app.utils.supabase_client as supabase_module
-    from backend.app.utils.auth_adapter import use_supabase_auth, is_supabase_available, should_use_supabase
+    from backend.app.utils.auth_adapter import use_supabase_auth, is_supabase_available
     
     # Get supabase instance 
     supabase = supabase_module.supabase
@@ -42,9 +42,9 @@ try:
         
     print("\n=== Auth Mode Test ===")
     print(f"use_supabase_auth: {use_supabase_auth}")
-    print(f"is_supabase_available(): {is_supabase_available()}")
-    print(f"should_use_supabase: {should_use_supabase}")
-    print(f"Actual auth mode: {'Supabase' if should_use_supabase else 'JWT'}")
+    supabase_live = is_supabase_available()
+    print(f"is_supabase_available(): {supabase_live}")
+    print(f"Actual auth mode: {'Supabase' if supabase_live else 'JWT'}")
     
 except Exception as e:
     print(f"Error during testing: {str(e)}") 
\ No newline at end of file
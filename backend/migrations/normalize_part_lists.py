@@ -0,0 +1,85 @@
+"""
+Script to convert legacy string values in the parts list columns to JSON arrays.
+
+Parts created through the Supabase path used to store feelings, beliefs, triggers
+and needs as Python list reprs (e.g. "['anxious', 'tired']") inside the JSONB
+columns. Part.to_dict() no longer parses those strings, so run this once against
+existing databases. Rows that already hold arrays are left untouched.
+"""
+import os
+import sys
+import ast
+import psycopg2
+from psycopg2.extras import Json
+from urllib.parse import urlparse
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+LIST_FIELDS = ('feelings', 'beliefs', 'triggers', 'needs')
+
+def _parse_list(value):
+    """Parse a legacy list repr, falling back to an empty list."""
+    try:
+        parsed = ast.literal_eval(value)
+    except (ValueError, SyntaxError, TypeError):
+        return []
+    return parsed if isinstance(parsed, list) else []
+
+def normalize_part_lists():
+    """Rewrite string-valued list columns on parts as JSON arrays."""
+    # Get database URL from environment variable
+    db_url = os.getenv('DATABASE_URL')
+    if not db_url:
+        logger.error("DATABASE_URL environment variable not set.")
+        sys.exit(1)
+
+    # Parse database URL
+    parsed_url = urlparse(db_url)
+    dbname = parsed_url.path[1:]  # Remove leading slash
+    user = parsed_url.username
+    password = parsed_url.password
+    host = parsed_url.hostname
+    port = parsed_url.port or 5432
+
+    # Connect to PostgreSQL
+    try:
+        logger.info(f"Connecting to PostgreSQL database {dbname} on {host}:{port}")
+        conn = psycopg2.connect(
+            dbname=dbname,
+            user=user,
+            password=password,
+            host=host,
+            port=port
+        )
+        cursor = conn.cursor()
+
+        for field in LIST_FIELDS:
+            # #>> '{}' extracts the JSON string scalar as text
+            cursor.execute(
+                f"SELECT id, {field} #>> '{{}}' FROM parts WHERE jsonb_typeof({field}) = 'string';"
+            )
+            rows = cursor.fetchall()
+            logger.info(f"Normalizing {len(rows)} string values in parts.{field}...")
+            for part_id, value in rows:
+                cursor.execute(
+                    f"UPDATE parts SET {field} = %s WHERE id = %s;",
+                    (Json(_parse_list(value)), part_id)
+                )
+
+        conn.commit()
+
+        # Close connection
+        cursor.close()
+        conn.close()
+
+    except psycopg2.Error as e:
+        logger.error(f"Error normalizing part list fields: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    logger.info("Normalizing part list fields...")
+    normalize_part_lists()
+    logger.info("Done!")
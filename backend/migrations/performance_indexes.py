@@ -0,0 +1,103 @@
+"""
+Script to create the indexes that back the application's hot queries.
+
+This script should be run manually against existing PostgreSQL databases
+(including Supabase) whose tables were not created from the current models.
+Every statement is idempotent, so it is safe to run repeatedly.
+"""
+import os
+import sys
+import psycopg2
+from urllib.parse import urlparse
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Index name -> statement, applied in order. Names match the definitions on the models.
+# CONCURRENTLY avoids locking the tables against writes while building.
+INDEX_STATEMENTS = {
+    # Parts list, part-limit counts and the Self-part lookup all filter by system
+    'ix_parts_system_id_name': (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_parts_system_id_name "
+        "ON parts (system_id, name) INCLUDE (id);"
+    ),
+    # Superseded by ix_parts_system_id_name
+    'parts_system_id_idx': "DROP INDEX CONCURRENTLY IF EXISTS parts_system_id_idx;",
+    # One system per user; required by the ON CONFLICT (user_id) upsert in GET /system
+    'ifs_systems_user_id_key': (
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ifs_systems_user_id_key "
+        "ON ifs_systems (user_id);"
+    ),
+    # Relationship list and duplicate check; also serves plain system_id lookups
+    'ux_relationships_system_part1_part2': (
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_relationships_system_part1_part2 "
+        "ON relationships (system_id, part1_id, part2_id);"
+    ),
+    # Per-part relationship lookups (part delete, source/target relationships)
+    'ix_relationships_part1_id': (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_relationships_part1_id "
+        "ON relationships (part1_id);"
+    ),
+    'ix_relationships_part2_id': (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_relationships_part2_id "
+        "ON relationships (part2_id);"
+    ),
+    # Case-insensitive email lookups in auth bootstrap and registration
+    'ix_users_email_lower': (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_email_lower "
+        "ON users (lower(email));"
+    ),
+    # Guided session message history, read by session_id in timestamp order
+    'ix_session_messages_session_ts': (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_session_messages_session_ts "
+        "ON session_messages (session_id, timestamp);"
+    ),
+}
+
+def create_indexes():
+    """Create any missing performance indexes in PostgreSQL."""
+    # Get database URL from environment variable
+    db_url = os.getenv('DATABASE_URL')
+    if not db_url:
+        logger.error("DATABASE_URL environment variable not set.")
+        sys.exit(1)
+    
+    # Parse database URL
+    parsed_url = urlparse(db_url)
+    dbname = parsed_url.path[1:]  # Remove leading slash
+    user = parsed_url.username
+    password = parsed_url.password
+    host = parsed_url.hostname
+    port = parsed_url.port or 5432
+    
+    # Connect to PostgreSQL
+    try:
+        logger.info(f"Connecting to PostgreSQL database {dbname} on {host}:{port}")
+        conn = psycopg2.connect(
+            dbname=dbname,
+            user=user,
+            password=password,
+            host=host,
+            port=port
+        )
+        conn.autocommit = True
+        cursor = conn.cursor()
+        
+        for name, statement in INDEX_STATEMENTS.items():
+            logger.info(f"Applying {name}...")
+            cursor.execute(statement)
+            
+        # Close connection
+        cursor.close()
+        conn.close()
+        
+    except psycopg2.Error as e:
+        logger.error(f"Error creating indexes: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    logger.info("Creating performance indexes...")
+    create_indexes()
+    logger.info("Done!")
@@ -0,0 +1,77 @@
+"""
+Tests for DBAdapter's SQLAlchemy update path.
+"""
+import uuid
+
+import pytest
+
+flask = pytest.importorskip("flask")
+flask_sqlalchemy = pytest.importorskip("flask_sqlalchemy")
+
+from sqlalchemy import Column, DateTime, String, Uuid, func
+
+from backend.app.utils.db_adapter import DBAdapter
+
+db = flask_sqlalchemy.SQLAlchemy()
+
+
+class Item(db.Model):
+    """Minimal model with a UUID key and an updated_at column."""
+    __tablename__ = 'items'
+
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    name = Column(String(50), nullable=False)
+    updated_at = Column(DateTime, onupdate=func.now())
+
+    def to_dict(self):
+        return {
+            "id": str(self.id),
+            "name": self.name,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+@pytest.fixture
+def adapter():
+    """DBAdapter bound to an in-memory SQLite database."""
+    app = flask.Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db_adapter = DBAdapter(db)
+        db_adapter.using_supabase = False
+        yield db_adapter
+        db.session.remove()
+        db.drop_all()
+
+
+def test_update_returns_new_values_after_get_by_id(adapter):
+    item = Item(name="a")
+    db.session.add(item)
+    db.session.commit()
+    item_id = str(item.id)
+
+    # Routes load the record first, putting it in the identity map
+    assert adapter.get_by_id('items', Item, item_id)["name"] == "a"
+
+    updated = adapter.update('items', Item, item_id, {"name": "b", "image_url": "ignored"})
+
+    assert updated["name"] == "b"
+    assert updated["updated_at"] is not None
+    db.session.expire_all()
+    assert db.session.get(Item, item.id).name == "b"
+
+
+def test_update_missing_record_returns_none(adapter):
+    assert adapter.update('items', Item, str(uuid.uuid4()), {"name": "b"}) is None
+
+
+def test_get_many_accepts_string_ids(adapter):
+    items = [Item(name="a"), Item(name="b")]
+    db.session.add_all(items)
+    db.session.commit()
+
+    found = adapter.get_many('items', Item, [str(item.id) for item in items])
+
+    assert {record["name"] for record in found.values()} == {"a", "b"}
@@ -0,0 +1,34 @@
+"""
+Gunicorn configuration for serving backend.wsgi:app in production.
+
+Usage:
+  gunicorn backend.wsgi:app   # picks up this file from the working directory
+
+All values can be overridden through environment variables.
+"""
+import os
+
+# Bind to the platform-provided port
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Request handlers spend most of their time waiting on Postgres/Supabase/LLM I/O,
+# so threaded workers give concurrency without an async rewrite of the blueprints
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+# Each worker loads the ML stack and opens its own DB pool, so keep the default small;
+# cpu_count() reports the host's cores inside containers. Scale with WEB_CONCURRENCY.
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Reuse client connections between requests (the frontend polls several endpoints)
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# LLM-backed guided session messages can take a while to generate
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# Recycle workers periodically to bound memory growth from the ML dependencies
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info').lower()